@@ -9,17 +9,31 @@ Input:  preprocessed result dict from Preprocessor
 Output: Metadata schema (selectors + encoding + anomalies) consumed by Extractor
 """
 
-import json
-from typing import Optional
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Iterator, Optional, Union
 
+from pydantic import ValidationError
+
+from . import fast_json
 from .schemas import Metadata, ContentZones, ExtractionHints, SelectorList
-from .llm_client import LLMClient, BaseLLMClient, LLMProvider
+from .llm_client import LLMClient, BaseLLMClient, LLMProvider, DEFAULT_BATCH_TIMEOUT
 from .metadata_cache import MetadataCache, get_default_cache
+from .prompt_compressor import (
+    compress_for_analysis, TEXT_LIMIT, MAX_REPEAT, KEEP_ATTRIBUTES,
+    EMPTY_ELEMENTS, SKIP_ELEMENTS, TRUNCATION_MARKER
+)
 from .exceptions import AnalysisError, LLMClientError
+from .rate_limiter import AsyncRateLimiter, estimate_tokens
 from .logger import get_module_logger
 
 logger = get_module_logger("analyzer")
 
+# Log calls in this module pass arguments %-style (not f-strings) so the
+# message is only formatted if the record actually passes the level filter.
+
 
 # --- LLM Prompt Design ---
 # The system prompt is kept short and role-focused: it tells the LLM *what it is*
@@ -41,15 +55,11 @@ Respond with valid JSON only. Provide both CSS selectors and XPath expressions."
 # producing valid JSON when they can see the exact shape expected.
 # The "Rules" section provides common selector patterns as examples to nudge
 # the LLM toward well-known semantic elements rather than fragile class names.
+# The per-document parts (anomalies, HTML) come last: everything before them
+# is byte-identical on every call, so it could be reused by prompt prefix
+# caching once it grows past the providers' minimum (see USER_PROMPT_PREFIX).
 
-USER_PROMPT = """Analyze this HTML and provide metadata for content extraction.
-
-HTML:
-```html
-{html}
-```
-
-Detected anomalies: {anomalies}
+USER_PROMPT = """Analyze the HTML below and provide metadata for content extraction.
 
 Respond with JSON:
 {{
@@ -67,34 +77,235 @@ Rules:
 - nav: <nav>, <header>, .menu
 - footer: <footer>, #footer
 - exclude: .ads, .sidebar, [style*="display:none"]
-- Provide both css and xpath arrays for each zone"""
+- Provide both css and xpath arrays for each zone
+
+Detected anomalies: {anomalies}
+
+HTML:
+```html
+{html}
+```"""
+
+# Batch ("row-marshaled") variant of USER_PROMPT: several documents share one
+# LLM call.  Each document is fenced with numbered <<<DOC i>>> / <<<END i>>>
+# markers so the LLM can echo the index back as "doc_id" — that is how we map
+# answers to inputs, since the LLM may reorder or drop entries.  The answer is
+# wrapped in an object because OpenAI's JSON mode only allows object roots.
+
+BATCH_USER_PROMPT = """Analyze each of the HTML documents below and provide metadata for content extraction.
+Each document is wrapped in <<<DOC i>>> ... <<<END i>>> markers, where i is its doc_id.
+
+Respond with JSON containing one entry per document:
+{{
+    "documents": [
+        {{
+            "doc_id": 0,
+            "content_zones": {{
+                "main": {{"css": ["selectors"], "xpath": ["expressions"]}},
+                "nav": {{"css": [], "xpath": []}},
+                "footer": {{"css": [], "xpath": []}},
+                "exclude": {{"css": [], "xpath": []}}
+            }},
+            "anomalies_detected": []
+        }}
+    ]
+}}
+
+Rules:
+- main: <main>, <article>, #content, .post-body
+- nav: <nav>, <header>, .menu
+- footer: <footer>, #footer
+- exclude: .ads, .sidebar, [style*="display:none"]
+- Provide both css and xpath arrays for each zone
+- Analyze every document independently and include its doc_id
+
+{documents}"""
+
+# --- Precompiled prompt pieces ---
+# The templates are split once at import time around their placeholders so
+# each call is a plain list join (no per-call template scan in str.format).
+
+def _split_template(template: str, *fields: str) -> tuple[str, ...]:
+    """
+    Split a str.format template around its {field}s and unescape the braces
+    of each literal piece.
+
+    Raises ValueError unless each field appears exactly once, in the given order.
+    """
+    pieces = []
+    rest = template
+    for field in fields:
+        parts = rest.split("{" + field + "}")
+        if len(parts) != 2:
+            raise ValueError(f"Template must contain {{{field}}} exactly once")
+        pieces.append(parts[0])
+        rest = parts[1]
+    pieces.append(rest)
+    return tuple(piece.replace("{{", "{").replace("}}", "}") for piece in pieces)
+
+
+_PROMPT_PRE, _PROMPT_MID, _PROMPT_SUF = _split_template(USER_PROMPT, "anomalies", "html")
+_BATCH_PRE, _BATCH_SUF = _split_template(BATCH_USER_PROMPT, "documents")
+
+# The static leading part of each prompt, passed to the LLM client as
+# cacheable_prefix.  Together with SYSTEM_PROMPT it is only a few hundred
+# tokens, below the 1024-token minimum both providers cache, so today it is
+# a hint only: AnthropicClient adds a cache breakpoint just when the prefix
+# is long enough, and OpenAI caches long identical prefixes automatically.
+USER_PROMPT_PREFIX = _PROMPT_PRE
+BATCH_PROMPT_PREFIX = _BATCH_PRE
+
+@lru_cache(maxsize=256)
+def _anomalies_json(anomalies: tuple) -> str:
+    """JSON for an anomaly list — the same few combinations recur constantly."""
+    return fast_json.dumps(list(anomalies))
+
+
+def build_user_prompt(html: str, anomalies: list[str]) -> str:
+    """
+    Fill USER_PROMPT with the HTML and the anomaly list.
+
+    Same text as USER_PROMPT.format(html=..., anomalies=...), except the
+    anomalies are serialized by fast_json.dumps (compact separators), not
+    json.dumps.
+    """
+    return "".join((_PROMPT_PRE, _anomalies_json(tuple(anomalies)), _PROMPT_MID, html, _PROMPT_SUF))
+
+
+def build_batch_prompt(documents: list[tuple[str, list[str]]]) -> str:
+    """Build BATCH_USER_PROMPT for (html, anomalies) pairs; doc_id = list index."""
+    parts = [_BATCH_PRE]
+    for doc_id, (html, anomalies) in enumerate(documents):
+        if doc_id:
+            parts.append("\n\n")
+        parts.extend((
+            f"<<<DOC {doc_id}>>>\nDetected anomalies: ", _anomalies_json(tuple(anomalies)),
+            "\n```html\n", html, f"\n```\n<<<END {doc_id}>>>"
+        ))
+    parts.append(_BATCH_SUF)
+    return "".join(parts)
+
+
+# --- Zone tools (opt-in, Analyzer(use_zone_tools=True)) ---
+# Instead of one monolithic JSON answer, the LLM reports each zone through its
+# own tool.  Models that support parallel tool calls emit all four calls in a
+# single response, so this costs no extra round trips; the calls are folded
+# back into the usual {"content_zones": ...} shape before parsing.
+
+_SELECTOR_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "css": {"type": "array", "items": {"type": "string"}},
+        "xpath": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["css", "xpath"]
+}
+
+
+def _zone_tool(zone: str, description: str) -> dict:
+    return {
+        "name": f"analyze_{zone}",
+        "description": f"Report the selectors for the {description}.",
+        "parameters": _SELECTOR_PARAMETERS
+    }
+
+
+ZONE_TOOLS = [
+    _zone_tool("main", "main content zone (<main>, <article>, #content, .post-body)"),
+    _zone_tool("nav", "navigation zone (<nav>, <header>, .menu); empty arrays if none"),
+    _zone_tool("footer", "footer zone (<footer>, #footer); empty arrays if none"),
+    _zone_tool("exclude", "elements to exclude (.ads, .sidebar, hidden elements); "
+                          "empty arrays if none"),
+]
+
+# Tool name → content_zones key
+_ZONE_TOOL_NAMES = {tool["name"]: tool["name"][len("analyze_"):] for tool in ZONE_TOOLS}
+
+# Appended to the normal user prompt in tool mode; the JSON prompt stays the
+# fallback if the model answers without calling any tool.
+ZONE_TOOLS_INSTRUCTION = """
+
+Instead of replying with JSON, report the zones by calling the tools
+analyze_main, analyze_nav, analyze_footer and analyze_exclude. Call all four
+in one response."""
+
+# Fingerprint of everything that shapes what the LLM sees, stored with every
+# cache entry: the prompts, the tool-mode schema and instruction, and the
+# compressor settings that condense the page.  Changing any of them changes
+# it, so metadata produced under the old input stops being served instead of
+# lingering until someone clears the cache by hand.  (repr() and sorted()
+# keep it stable across runs and independent of orjson being installed.)
+PROMPT_VERSION = hashlib.blake2b(
+    "\0".join((
+        SYSTEM_PROMPT, USER_PROMPT, BATCH_USER_PROMPT,
+        repr(ZONE_TOOLS), ZONE_TOOLS_INSTRUCTION,
+        repr((TEXT_LIMIT, MAX_REPEAT, KEEP_ATTRIBUTES, sorted(EMPTY_ELEMENTS),
+              sorted(SKIP_ELEMENTS), TRUNCATION_MARKER))
+    )).encode("utf-8"),
+    digest_size=8
+).hexdigest()
 
 
 class Analyzer:
     """LLM-based HTML analyzer."""
 
+    # Default LLM input budget (characters of compressed HTML per document).
+    # Most LLMs have token limits, and the structural selectors we need are
+    # almost always visible early in the document.
+    MAX_HTML_CHARS = 15000
+
+    # First retry delay (seconds) for the async path; doubles on each attempt
+    RETRY_BASE_DELAY = 1.0
+
     def __init__(
         self,
         llm_client: Optional[BaseLLMClient] = None,
         provider: Optional[LLMProvider] = None,
         use_cache: bool = True,
-        cache: Optional[MetadataCache] = None
+        cache: Optional[MetadataCache] = None,
+        similarity_threshold: Optional[float] = None,
+        max_html_chars: Optional[int] = None,
+        use_zone_tools: bool = False
     ):
         self.llm_client = llm_client
+        # Per-instance budget so it can be tuned to the provider's context size
+        self.max_html_chars = max_html_chars or self.MAX_HTML_CHARS
         self.use_cache = use_cache
+        # Opt-in: reuse cached metadata from structurally similar pages (same
+        # template) after an exact miss, e.g. 0.9.  None (the default) means
+        # only exact hits count — a similar page's selectors are a guess.
+        self.similarity_threshold = similarity_threshold
         # Use caller-supplied cache, or the shared default, or None if caching disabled
         self.cache = cache if cache else (get_default_cache() if use_cache else None)
-
-        # Lazy-create the LLM client only if one wasn't injected (enables testing
-        # with mock clients without needing a real API key).
+        # Ask for zones via parallel tool calls (see ZONE_TOOLS) instead of one
+        # JSON object.  Single-document calls only; analyze_many() batches
+        # always use the JSON prompt.
+        self.use_zone_tools = use_zone_tools
+
+        # The LLM client is created lazily by _get_client() on the first real
+        # LLM call (unless one was injected, e.g. a mock in tests).  Runs that
+        # are served entirely from cache never import an SDK or need an API key.
+        self._provider = provider
+
+    def _get_client(self) -> BaseLLMClient:
+        """Return the LLM client, creating (and memoizing) it on first use."""
         if self.llm_client is None:
             try:
-                self.llm_client = LLMClient.create(provider=provider)
+                self.llm_client = LLMClient.create(provider=self._provider)
             except LLMClientError as e:
                 raise AnalysisError(
                     message=f"Failed to initialize LLM client: {e.message}",
                     suggested_prompt="Check API key. Set OPENAI_API_KEY or ANTHROPIC_API_KEY."
                 )
+        return self.llm_client
+
+    def warm_up(self) -> None:
+        """Create the LLM client and open its connection before the first analysis."""
+        try:
+            self._get_client().warm_up()
+        except AnalysisError as e:
+            # No key/SDK yet is fine here; analyze() reports it if it matters
+            logger.debug("LLM warm-up skipped: %s", e.message)
 
     def analyze(
         self,
@@ -110,35 +321,25 @@ class Analyzer:
         # --- Cache-first flow ---
         # Check the file-based cache before calling the LLM.  This saves cost
         # and latency for pages we've already seen (same source_name or same HTML hash).
-        if self.use_cache and self.cache and not force_refresh:
-            cached = self.cache.get(html, source_name)
+        # Hash once; the same key is reused when storing the LLM result
+        cache_key = self._cache_key(html, source_name)
+        if not force_refresh:
+            cached = self._lookup_cache(html, source_name, cache_key)
             if cached:
-                logger.info(f"Cache hit: {source_name or 'unknown'}")
                 return cached
 
         logger.info("Analyzing HTML")
 
-        # Truncate to ~15K characters before sending to the LLM.
-        # Most LLMs have token limits, and the structural selectors we need are
-        # almost always visible in the first 15K chars of normalized HTML.
-        # The <!-- TRUNCATED --> marker lets the LLM know the input was cut.
-        if len(html) > 15000:
-            html = html[:15000] + "\n<!-- TRUNCATED -->"
-
-        prompt = USER_PROMPT.format(html=html, anomalies=json.dumps(anomalies))
+        prompt_html, ratio = self._compress(html)
+        prompt = build_user_prompt(prompt_html, anomalies)
 
         try:
-            response = self.llm_client.complete_json(prompt=prompt, system_prompt=SYSTEM_PROMPT)
+            response = self._complete(prompt)
             metadata = self._parse_response(response, encoding)
 
             # Persist to cache so subsequent runs skip the LLM call
-            if self.use_cache and self.cache:
-                self.cache.put(
-                    html=preprocessed_result["normalized_html"],
-                    metadata=metadata,
-                    source_name=source_name,
-                    extra_info={"anomalies": anomalies, "encoding": encoding}
-                )
+            self._store(preprocessed_result, metadata, source_name, compression_ratio=ratio,
+                        cache_key=cache_key)
 
             logger.info("Analysis complete")
             return metadata
@@ -151,9 +352,474 @@ class Analyzer:
                 suggested_prompt=f"Error: {e}. Check HTML structure."
             )
 
+    async def aanalyze(
+        self,
+        preprocessed_result: dict,
+        source_name: Optional[str] = None,
+        force_refresh: bool = False,
+        limiter: Optional[AsyncRateLimiter] = None,
+        max_attempts: int = 3
+    ) -> Metadata:
+        """
+        Async version of analyze().
+
+        The blocking LLM call runs in a worker thread so many documents can be
+        in flight at once.  Failed calls are retried with exponential backoff;
+        an optional limiter throttles requests/tokens per minute.
+        """
+        html = preprocessed_result["normalized_html"]
+        anomalies = preprocessed_result.get("anomalies", [])
+        encoding = preprocessed_result.get("detected_encoding", "utf-8")
+
+        # Hash once; the same key is reused when storing the LLM result
+        cache_key = self._cache_key(html, source_name)
+        if not force_refresh:
+            cached = self._lookup_cache(html, source_name, cache_key)
+            if cached:
+                return cached
+
+        logger.info("Analyzing HTML (async)")
+
+        prompt_html, ratio = self._compress(html)
+        prompt = build_user_prompt(prompt_html, anomalies)
+
+        try:
+            response = await self._acomplete_json(prompt, limiter, max_attempts)
+        except LLMClientError as e:
+            raise AnalysisError(
+                message=f"LLM failed after {max_attempts} attempts: {e.message}",
+                suggested_prompt=f"Error: {e}. Check HTML structure or lower max_concurrency."
+            )
+
+        metadata = self._parse_response(response, encoding)
+        self._store(preprocessed_result, metadata, source_name, compression_ratio=ratio,
+                    cache_key=cache_key)
+
+        logger.info("Analysis complete")
+        return metadata
+
+    async def aanalyze_many(
+        self,
+        preprocessed_results: list[dict],
+        source_names: Optional[list[Optional[str]]] = None,
+        force_refresh: bool = False,
+        max_concurrency: int = 10,
+        max_rpm: Optional[int] = 500,
+        max_tpm: Optional[int] = None,
+        max_attempts: int = 3
+    ) -> list[Union[Metadata, AnalysisError]]:
+        """
+        Analyze many documents concurrently.
+
+        At most max_concurrency LLM calls are in flight, and all of them share
+        one RPM/TPM limiter.  Results come back in input order; a document that
+        fails holds its AnalysisError in place of a Metadata, so one bad page
+        doesn't throw away the rest of the batch.
+        """
+        if source_names is None:
+            source_names = [None] * len(preprocessed_results)
+        if len(source_names) != len(preprocessed_results):
+            raise ValueError("source_names must match preprocessed_results in length")
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        limiter = AsyncRateLimiter(max_rpm=max_rpm, max_tpm=max_tpm)
+
+        async def run_one(preprocessed: dict, source_name: Optional[str]) -> Metadata:
+            async with semaphore:
+                return await self.aanalyze(preprocessed, source_name=source_name,
+                                           force_refresh=force_refresh, limiter=limiter,
+                                           max_attempts=max_attempts)
+
+        # gather() preserves argument order, so results line up with inputs
+        results = await asyncio.gather(
+            *(run_one(p, name) for p, name in zip(preprocessed_results, source_names)),
+            return_exceptions=True
+        )
+
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException) and not isinstance(result, AnalysisError):
+                # Unexpected failures (e.g. a malformed preprocessed dict) are
+                # surfaced the same way as LLM failures.
+                results[i] = AnalysisError(
+                    message=f"Analysis failed: {result}",
+                    suggested_prompt="Check the preprocessed input for this document."
+                )
+        return results
+
+    async def _acomplete_json(
+        self,
+        prompt: str,
+        limiter: Optional[AsyncRateLimiter],
+        max_attempts: int
+    ) -> dict:
+        """Call the LLM off the event loop, retrying LLMClientError with backoff."""
+        for attempt in range(max(1, max_attempts)):
+            if limiter:
+                await limiter.acquire(estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt))
+            try:
+                return await asyncio.to_thread(self._complete, prompt)
+            except LLMClientError as e:
+                if attempt >= max_attempts - 1:
+                    raise
+                delay = self.RETRY_BASE_DELAY * (2 ** attempt)
+                logger.warning("LLM call failed (%s), retrying in %.1fs", e.message, delay)
+                await asyncio.sleep(delay)
+
+    def _complete(self, prompt: str) -> dict:
+        """Run one single-document LLM call and return the raw response dict."""
+        if self.use_zone_tools:
+            response = self._complete_zone_tools(prompt)
+            if response is not None:
+                return response
+        return self._get_client().complete_json(prompt=prompt, system_prompt=SYSTEM_PROMPT,
+                                                cacheable_prefix=USER_PROMPT_PREFIX)
+
+    def _complete_zone_tools(self, prompt: str) -> Optional[dict]:
+        """
+        Ask for the zones via ZONE_TOOLS and fold the calls into a response dict.
+
+        Returns None (caller falls back to the JSON prompt) if the model made
+        no zone tool calls.  If the client has no tool support at all, tool
+        mode is switched off for this Analyzer.
+        """
+        try:
+            calls = self._get_client().complete_tools(
+                prompt + ZONE_TOOLS_INSTRUCTION, ZONE_TOOLS, system_prompt=SYSTEM_PROMPT
+            )
+        except NotImplementedError:
+            logger.info("LLM client has no tool support; using the JSON prompt")
+            self.use_zone_tools = False
+            return None
+
+        zones = {}
+        for name, arguments in calls:
+            zone = _ZONE_TOOL_NAMES.get(name)
+            if zone is not None and isinstance(arguments, dict):
+                zones[zone] = arguments
+
+        if not zones:
+            logger.info("No zone tool calls in LLM response; retrying with the JSON prompt")
+            return None
+        return {"content_zones": zones}
+
+    def analyze_many(
+        self,
+        preprocessed_results: list[dict],
+        source_names: Optional[list[Optional[str]]] = None,
+        force_refresh: bool = False,
+        marshal_batch_size: int = 6,
+        max_workers: int = 1,
+        provider_rpm: Optional[int] = None
+    ) -> list[Metadata]:
+        """
+        Analyze several preprocessed documents, packing up to
+        marshal_batch_size cache misses into each LLM call.
+
+        One round trip per chunk instead of per document amortizes the
+        HTTP/queuing overhead and per-request rate limits.  Small batches
+        (4–8) keep the prompt short enough that latency stays roughly flat.
+        With max_workers > 1, chunks are sent concurrently from a thread
+        pool (for sync SDKs; see aanalyze_many for the asyncio version),
+        capped by provider_rpm // 60 when the RPM limit is known.
+
+        Returns one Metadata per input, in input order.
+        """
+        if source_names is None:
+            source_names = [None] * len(preprocessed_results)
+        if len(source_names) != len(preprocessed_results):
+            raise ValueError("source_names must match preprocessed_results in length")
+
+        results: list[Optional[Metadata]] = [None] * len(preprocessed_results)
+        cache_keys = [self._cache_key(p["normalized_html"], name)
+                      for p, name in zip(preprocessed_results, source_names)]
+
+        # --- Cache-first flow (same as analyze) ---
+        # Only cache misses are marshaled into the batch prompt.
+        misses = []
+        for i, (preprocessed, source_name) in enumerate(zip(preprocessed_results, source_names)):
+            if not force_refresh:
+                cached = self._lookup_cache(preprocessed["normalized_html"], source_name, cache_keys[i])
+                if cached:
+                    results[i] = cached
+                    continue
+            misses.append(i)
+
+        step = max(1, marshal_batch_size)
+        chunks = [misses[start:start + step] for start in range(0, len(misses), step)]
+
+        def run_chunk(chunk: list[int]) -> None:
+            if len(chunk) == 1:
+                # Nothing to marshal — the single-document prompt is simpler for the LLM
+                i = chunk[0]
+                results[i] = self.analyze(preprocessed_results[i], source_name=source_names[i],
+                                          force_refresh=True)
+                return
+
+            # Entries are streamed: each one is cached as soon as it arrives,
+            # before the LLM has finished the rest of the batch.
+            answered = set()
+            for doc_id, metadata, ratio in self._analyze_batch([preprocessed_results[i] for i in chunk]):
+                i = chunk[doc_id]
+                self._store(preprocessed_results[i], metadata, source_names[i],
+                            compression_ratio=ratio, cache_key=cache_keys[i])
+                results[i] = metadata
+                answered.add(doc_id)
+
+            for doc_id, i in enumerate(chunk):
+                if doc_id not in answered:
+                    # The LLM skipped this document (or its entry was
+                    # invalid) — retry it on its own rather than failing
+                    # the whole batch.
+                    logger.warning("Batch response missing doc_id %d, analyzing individually", doc_id)
+                    results[i] = self.analyze(preprocessed_results[i], source_name=source_names[i],
+                                              force_refresh=True)
+
+        # LLM calls are IO-bound and the SDKs release the GIL while waiting on
+        # the network, so plain threads give ~max_workers x throughput up to
+        # the provider's rate limit.  Each chunk writes only its own result
+        # slots, so input order is preserved without extra bookkeeping.
+        workers = min(max(1, max_workers), len(chunks))
+        if provider_rpm:
+            # Don't start more parallel calls per second than the RPM cap allows
+            workers = min(workers, max(1, provider_rpm // 60))
+
+        if workers <= 1:
+            for chunk in chunks:
+                run_chunk(chunk)
+        else:
+            self._get_client()  # create the client once, before threads race for it
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(run_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    future.result()  # re-raise the first AnalysisError
+
+        return results
+
+    def analyze_many_offline(
+        self,
+        preprocessed_results: list[dict],
+        source_names: Optional[list[Optional[str]]] = None,
+        force_refresh: bool = False,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT
+    ) -> list[Union[Metadata, AnalysisError]]:
+        """
+        Analyze many documents through the provider's offline batch API.
+
+        Cache misses are submitted as one batch job of single-document
+        prompts and polled until it finishes — hours rather than seconds,
+        at roughly half the token price.  Meant for overnight corpus runs.
+
+        Results come back in input order; a document whose request failed,
+        or whose result could not be parsed, holds its AnalysisError in
+        place of a Metadata.  If the batch is not
+        finished after `timeout` seconds (None = no limit), AnalysisError is
+        raised for the whole call.
+        """
+        if source_names is None:
+            source_names = [None] * len(preprocessed_results)
+        if len(source_names) != len(preprocessed_results):
+            raise ValueError("source_names must match preprocessed_results in length")
+
+        results: list[Optional[Union[Metadata, AnalysisError]]] = [None] * len(preprocessed_results)
+        cache_keys = [self._cache_key(p["normalized_html"], name)
+                      for p, name in zip(preprocessed_results, source_names)]
+
+        # --- Cache-first flow (same as analyze) ---
+        misses = []
+        for i, (preprocessed, source_name) in enumerate(zip(preprocessed_results, source_names)):
+            if not force_refresh:
+                cached = self._lookup_cache(preprocessed["normalized_html"], source_name, cache_keys[i])
+                if cached:
+                    results[i] = cached
+                    continue
+            misses.append(i)
+
+        if not misses:
+            return results
+
+        compressed = [self._compress(preprocessed_results[i]["normalized_html"]) for i in misses]
+        prompts = [build_user_prompt(prompt_html, preprocessed_results[i].get("anomalies", []))
+                   for (prompt_html, _), i in zip(compressed, misses)]
+
+        logger.info("Submitting %d documents to the batch API", len(prompts))
+        try:
+            responses = self._get_client().complete_json_batch(
+                prompts, system_prompt=SYSTEM_PROMPT, poll_interval=poll_interval, timeout=timeout
+            )
+        except LLMClientError as e:
+            raise AnalysisError(
+                message=f"LLM batch failed: {e.message}",
+                suggested_prompt=f"Error: {e}. Retry, or use analyze_many() for online calls."
+            )
+
+        for i, (_, ratio), response in zip(misses, compressed, responses):
+            if isinstance(response, LLMClientError):
+                results[i] = AnalysisError(
+                    message=f"LLM failed: {response.message}",
+                    suggested_prompt=f"Error: {response}. Check HTML structure."
+                )
+                continue
+            encoding = preprocessed_results[i].get("detected_encoding", "utf-8")
+            # One malformed result must not cost the rest of the batch
+            try:
+                metadata = self._parse_response(response, encoding)
+                self._store(preprocessed_results[i], metadata, source_names[i],
+                            compression_ratio=ratio, cache_key=cache_keys[i])
+            except AnalysisError as e:
+                results[i] = e
+                continue
+            except Exception as e:
+                results[i] = AnalysisError(
+                    message=f"Analysis failed: {e}",
+                    suggested_prompt="Check the preprocessed input for this document."
+                )
+                continue
+            results[i] = metadata
+
+        return results
+
+    def _analyze_batch(
+        self,
+        preprocessed_results: list[dict]
+    ) -> Iterator[tuple[int, Metadata, float]]:
+        """
+        Run one marshaled LLM call, streaming its answers.
+
+        Yields (doc_id, Metadata, prompt compression ratio) for each document
+        as soon as its entry has arrived.  Each doc_id is yielded at most
+        once; documents the LLM skipped, or whose entry fails validation,
+        are simply never yielded.
+        """
+        logger.info("Analyzing batch of %d documents", len(preprocessed_results))
+
+        compressed = [self._compress(p["normalized_html"]) for p in preprocessed_results]
+        prompt = build_batch_prompt([
+            (prompt_html, preprocessed.get("anomalies", []))
+            for (prompt_html, _), preprocessed in zip(compressed, preprocessed_results)
+        ])
+
+        seen = set()
+        try:
+            # Yields entries of {"documents": [...]}; a bare list (Anthropic has
+            # no JSON mode, so it sometimes returns the array directly) also works.
+            for entry in self._get_client().complete_json_stream(
+                prompt=prompt, system_prompt=SYSTEM_PROMPT, array_key="documents",
+                cacheable_prefix=BATCH_PROMPT_PREFIX
+            ):
+                if not isinstance(entry, dict):
+                    continue
+                doc_id = entry.get("doc_id")
+                if not isinstance(doc_id, int) or not 0 <= doc_id < len(preprocessed_results) \
+                        or doc_id in seen:
+                    continue
+                encoding = preprocessed_results[doc_id].get("detected_encoding", "utf-8")
+                try:
+                    metadata = self._parse_response(entry, encoding)
+                except AnalysisError as e:
+                    # Treat it like a missing entry: the caller re-analyzes
+                    # this document on its own
+                    logger.warning("Dropping invalid batch entry for doc_id %d: %s", doc_id, e.message)
+                    continue
+                seen.add(doc_id)
+                yield doc_id, metadata, compressed[doc_id][1]
+        except LLMClientError as e:
+            raise AnalysisError(
+                message=f"LLM failed: {e.message}",
+                suggested_prompt=f"Error: {e}. Check HTML structure or reduce marshal_batch_size."
+            )
+
+    def _cache_key(self, html: str, source_name: Optional[str]) -> Optional[str]:
+        """Cache key for this page, or None when caching is disabled."""
+        if not (self.use_cache and self.cache):
+            return None
+        return self.cache.compute_key(html, source_name)
+
+    def _lookup_cache(
+        self,
+        html: str,
+        source_name: Optional[str],
+        cache_key: Optional[str] = None
+    ) -> Optional[Metadata]:
+        """Exact cache lookup, falling back to a structurally similar page."""
+        if not (self.use_cache and self.cache):
+            return None
+
+        cached = self.cache.get(html, source_name, cache_key=cache_key,
+                                prompt_version=PROMPT_VERSION)
+        if cached:
+            logger.info("Cache hit: %s", source_name or "unknown")
+            return cached
+
+        # Same template, different content → the selectors still apply.
+        # The Extractor then runs them against this page's own HTML.
+        if self.similarity_threshold is not None:
+            cached = self.cache.get_similar(html, threshold=self.similarity_threshold,
+                                            prompt_version=PROMPT_VERSION)
+            if cached:
+                logger.info("Similarity hit: %s", source_name or "unknown")
+                return cached
+
+        return None
+
+    def _compress(self, html: str) -> tuple[str, float]:
+        """
+        Shrink HTML to the LLM input budget.
+
+        Returns the prompt HTML and its size relative to the input.
+        """
+        # Reduce the page to its tag/id/class skeleton first, so the whole
+        # document (including late footer/nav markup) usually fits.  Anything
+        # still over max_html_chars is cut and marked <!-- TRUNCATED -->.
+        compressed = compress_for_analysis(html, budget_chars=self.max_html_chars)
+        ratio = len(compressed) / len(html) if html else 1.0
+        return compressed, ratio
+
+    def _store(
+        self,
+        preprocessed_result: dict,
+        metadata: Metadata,
+        source_name: Optional[str],
+        compression_ratio: Optional[float] = None,
+        cache_key: Optional[str] = None
+    ) -> None:
+        """Persist an LLM result to the metadata cache (if caching is enabled)."""
+        if self.use_cache and self.cache:
+            extra_info = {
+                "anomalies": preprocessed_result.get("anomalies", []),
+                "encoding": preprocessed_result.get("detected_encoding", "utf-8")
+            }
+            if compression_ratio is not None:
+                extra_info["compression_ratio"] = round(compression_ratio, 3)
+            self.cache.put(
+                html=preprocessed_result["normalized_html"],
+                metadata=metadata,
+                source_name=source_name,
+                extra_info=extra_info,
+                cache_key=cache_key,
+                prompt_version=PROMPT_VERSION,
+                index_similar=self.similarity_threshold is not None
+            )
+
     def _parse_response(self, response: dict, encoding: str) -> Metadata:
-        """Parse LLM response into Metadata."""
-        zones = response.get("content_zones", {})
+        """
+        Parse LLM response into Metadata.
+
+        Raises:
+            AnalysisError: If the response isn't a JSON object or doesn't
+                validate as Metadata
+        """
+        # Cheap shape check up front so the per-zone parsing below can trust
+        # it's working with a dict (a null or non-object "content_zones"
+        # counts as "nothing detected").
+        if not isinstance(response, dict):
+            raise AnalysisError(
+                message=f"LLM response must be a JSON object, got {type(response).__name__}",
+                suggested_prompt="The LLM did not return a JSON object. Retry the analysis."
+            )
+        zones = response.get("content_zones") or {}
+        if not isinstance(zones, dict):
+            zones = {}
 
         def parse_selectors(data) -> SelectorList:
             """Handle multiple LLM response shapes gracefully.
@@ -162,35 +828,54 @@ class Analyzer:
             requested {css: [], xpath: []} dict.  This function normalizes
             all variants into a SelectorList.
             """
-            if data is None:
-                return SelectorList()
-            if isinstance(data, list):
+            # None, [] and {} all mean "nothing detected" — the common
+            # case for nav/footer/exclude — so skip the type dispatch
+            if not data:
+                return SelectorList.empty()
+            # Parsed JSON only ever holds exact list/dict/str, so identity
+            # checks on type() suffice; isinstance() remains for subclasses
+            # (e.g. an OrderedDict from a custom client).
+            t = type(data)
+            if t is list or (t is not dict and isinstance(data, list)):
                 # LLM returned a flat list — assume CSS selectors
                 return SelectorList(css=data, xpath=[])
-            if isinstance(data, dict):
+            if t is dict or isinstance(data, dict):
+                css = data.get("css") or []
+                xpath = data.get("xpath") or []
+                # A bare string instead of a one-element list is common
+                # enough to accept rather than fail validation on
                 return SelectorList(
-                    css=data.get("css", []),
-                    xpath=data.get("xpath", [])
+                    css=[css] if type(css) is str else css,
+                    xpath=[xpath] if type(xpath) is str else xpath
                 )
-            return SelectorList()
-
-        main = parse_selectors(zones.get("main"))
-        # If the LLM didn't identify a main content zone, default to <body>
-        # so the Extractor still has something to work with.
-        if main.is_empty():
-            main = SelectorList(css=["body"], xpath=["//body"])
-
-        return Metadata(
-            encoding=response.get("encoding", encoding),
-            content_zones=ContentZones(
-                main=main,
-                nav=parse_selectors(zones.get("nav")),
-                footer=parse_selectors(zones.get("footer")),
-                exclude=parse_selectors(zones.get("exclude"))
-            ),
-            extraction_hints=ExtractionHints(),
-            anomalies_detected=response.get("anomalies_detected", [])
-        )
+            return SelectorList.empty()
+
+        try:
+            main = parse_selectors(zones.get("main"))
+            # If the LLM didn't identify a main content zone, default to <body>
+            # so the Extractor still has something to work with.
+            if main.is_empty():
+                main = SelectorList(css=["body"], xpath=["//body"])
+
+            return Metadata(
+                encoding=response.get("encoding", encoding),
+                content_zones=ContentZones(
+                    main=main,
+                    nav=parse_selectors(zones.get("nav")),
+                    footer=parse_selectors(zones.get("footer")),
+                    exclude=parse_selectors(zones.get("exclude"))
+                ),
+                extraction_hints=ExtractionHints(),
+                anomalies_detected=response.get("anomalies_detected", [])
+            )
+        except ValidationError as e:
+            # e.g. {"css": [1, null]} — report it like any other analysis
+            # failure instead of leaking a raw pydantic error to callers
+            raise AnalysisError(
+                message=f"LLM response failed validation: {e.error_count()} error(s)",
+                suggested_prompt="The LLM returned selectors of the wrong type. Retry the analysis.",
+                details={"errors": e.errors(include_url=False, include_input=False)}
+            ) from e
 
 
 def analyze(preprocessed_result: dict, provider: Optional[LLMProvider] = None) -> Metadata:
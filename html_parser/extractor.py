@@ -11,6 +11,11 @@ Output: ExtractionResult containing ContentBlock list + warnings
 """
 
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+import soupsieve
 from bs4 import BeautifulSoup
 from lxml import etree
 
@@ -22,41 +27,89 @@ logger = get_module_logger("extractor")
 # Block-level elements that represent logical content units.
 # These define the granularity of extraction — each occurrence becomes one ContentBlock.
 # 'div' is included as a catch-all because many sites use <div> instead of semantic tags.
-BLOCK_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th',
-              'blockquote', 'figcaption', 'dt', 'dd', 'caption', 'div']
+# The tag sets are frozensets: they are tested with `in` for every node the
+# traversal loops visit, and find_all() accepts any iterable of names.
+BLOCK_TAGS = frozenset({'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th',
+                        'blockquote', 'figcaption', 'dt', 'dd', 'caption', 'div'})
 
 # Inline elements whose text is merged into the parent block's text.
 # We recurse into these but don't create separate blocks for them.
-INLINE_TAGS = ['span', 'strong', 'em', 'b', 'i', 'u', 'small', 'mark',
-               'sub', 'sup', 'code', 'abbr', 'cite', 'q', 'time']
+INLINE_TAGS = frozenset({'span', 'strong', 'em', 'b', 'i', 'u', 'small', 'mark',
+                         'sub', 'sup', 'code', 'abbr', 'cite', 'q', 'time'})
 
 # Link elements — handled separately to produce Link objects with href + text
-LINK_TAGS = ['a', 'area']
+LINK_TAGS = frozenset({'a', 'area'})
 
 # Matches residual HTML-like fragments that sometimes survive parsing
 # (e.g. "<<<< /p>" or "< /div>").  Used by _clean_text() to scrub text output.
 HTML_GARBAGE_PATTERN = re.compile(r'<+\s*/?[\w]*\s*>?')
 
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+# The same few LLM-written selectors are applied to every page from a site,
+# so compile each one once.  Bounded, since selectors come from LLM output
+# and hand-edited cache files.
+
+@lru_cache(maxsize=256)
+def _compiled_xpath(expr: str) -> etree.XPath:
+    return etree.XPath(expr)
+
+
+@lru_cache(maxsize=256)
+def _compiled_css(selector: str):
+    return soupsieve.compile(selector)
+
+
+def _make_soup(html: str) -> BeautifulSoup:
+    """
+    Parse HTML with BeautifulSoup's lxml tree builder.
+
+    lxml (libxml2) builds the tree roughly an order of magnitude faster than
+    html5lib.  The main input has already been normalized by the Preprocessor's
+    html5lib pass, so both builders agree on its structure; html5lib stays as
+    the fallback for documents lxml refuses.
+    """
+    try:
+        return BeautifulSoup(html, 'lxml')
+    except Exception as e:
+        logger.debug(f"lxml parse failed ({e}), retrying with html5lib")
+        return BeautifulSoup(html, 'html5lib')
+
 
 class Extractor:
     """Extracts structured content blocks from HTML."""
 
-    # Regex patterns for hidden inline styles
-    HIDDEN_PATTERNS = [
-        re.compile(r'display\s*:\s*none', re.IGNORECASE),
-        re.compile(r'visibility\s*:\s*hidden', re.IGNORECASE),
-    ]
+    # Hidden inline styles, as one alternation so each style is scanned once
+    HIDDEN_PATTERN = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden', re.IGNORECASE)
 
     def __init__(self, include_metadata: bool = False):
         self.include_metadata = include_metadata
         self._declared_charset = None
+        # Whether _fix_encoding() has anything to do for the current document
+        self._needs_encoding_fix = False
+        # lxml tree of the current document, parsed on the first XPath selector
+        self._xpath_tree = None
+        # XPath bridge state, built on the first XPath match: the exact
+        # lxml → soup element map (see _get_position_map), and lookup tables
+        # for the heuristic fallback (see _get_soup_index)
+        self._position_map = None
+        self._soup_index = None
+        # _is_hidden() results by element id; only valid while that soup is
+        # alive, so it is cleared whenever a new soup is parsed
+        self._hidden_cache: dict[int, bool] = {}
 
     def _is_hidden(self, elem) -> bool:
         """Check if element is hidden via inline style."""
-        style = elem.get('style', '')
-        if not style:
-            return False
-        return any(p.search(style) for p in self.HIDDEN_PATTERNS)
+        # The same element is checked as a block, as a child in _get_text()
+        # of its enclosing block, and again as a link; scan its style once.
+        key = id(elem)
+        hidden = self._hidden_cache.get(key)
+        if hidden is None:
+            style = elem.get('style', '')
+            hidden = bool(style) and self.HIDDEN_PATTERN.search(style) is not None
+            self._hidden_cache[key] = hidden
+        return hidden
 
     def _fix_encoding(self, text: str) -> str:
         """
@@ -75,7 +128,11 @@ class Extractor:
         Falls back to the original text if the round-trip fails (e.g. if the
         declared charset is wrong or the text contains mixed encodings).
         """
-        if not self._declared_charset or self._declared_charset.lower() in ('utf-8', 'utf8'):
+        if not self._needs_encoding_fix or not text:
+            return text
+        # Pure ASCII round-trips to itself through any ASCII-compatible
+        # charset, so skip both codec passes (most text on English pages)
+        if text.isascii():
             return text
         try:
             raw_bytes = text.encode(self._declared_charset)
@@ -99,11 +156,18 @@ class Extractor:
         """
         # Store declared charset for use by _fix_encoding() during text extraction
         self._declared_charset = declared_charset
+        # Decided once per document rather than on every text/link
+        self._needs_encoding_fix = bool(declared_charset) and \
+            declared_charset.lower() not in ('utf-8', 'utf8')
+        self._xpath_tree = None
+        self._position_map = None
+        self._soup_index = None
+        self._hidden_cache = {}
         warnings = []
         logger.info("Starting extraction")
 
         try:
-            soup = BeautifulSoup(html, 'html5lib')
+            soup = _make_soup(html)
         except Exception as e:
             logger.error(f"HTML parsing failed: {e}")
             return ExtractionResult(blocks=[], warnings=[f"Parse error: {e}"])
@@ -183,73 +247,128 @@ class Extractor:
         - < /div>
         - <<tag>>
         """
-        cleaned = HTML_GARBAGE_PATTERN.sub('', text)
-        # Collapse multiple spaces created by removal
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        return cleaned.strip()
+        if not text:
+            return text
+        # Garbage always starts with '<', which most text never contains
+        if '<' in text:
+            text = HTML_GARBAGE_PATTERN.sub('', text)
+        # Collapse whitespace (including gaps left by removal) and strip,
+        # in one split/join pass
+        return ' '.join(text.split())
 
     def _select_elements(self, soup: BeautifulSoup, html: str,
                          selectors: SelectorList, warnings: list) -> list:
         """Select elements using CSS and XPath selectors."""
-        elements = []
-        seen = set()  # Deduplicate by Python object id
+        # Keyed by Python object id: dedupes while keeping first-match order
+        elements = {}
 
         # CSS selectors — evaluated natively by BeautifulSoup
         for css in selectors.css:
             try:
-                for elem in soup.select(css):
-                    if id(elem) not in seen:
-                        elements.append(elem)
-                        seen.add(id(elem))
+                for elem in soup.select(_compiled_css(css)):
+                    elements.setdefault(id(elem), elem)
             except Exception as e:
                 logger.warning(f"Invalid CSS '{css}': {e}")
                 warnings.append(f"Invalid CSS: {css}")
 
         # XPath selectors — need lxml because BeautifulSoup doesn't support XPath.
-        # We parse the raw HTML into an lxml tree, run the XPath, then find the
-        # corresponding element in the BeautifulSoup tree via a heuristic match.
+        # We parse the raw HTML into an lxml tree (once per document, shared by
+        # every XPath in every zone), run the XPath, then find the
+        # corresponding element in the BeautifulSoup tree.
         for xpath in selectors.xpath:
             try:
-                tree = etree.HTML(html)
-                for lxml_elem in tree.xpath(xpath):
+                if self._xpath_tree is None:
+                    self._xpath_tree = etree.HTML(html)
+                for lxml_elem in _compiled_xpath(xpath)(self._xpath_tree):
                     soup_elem = self._find_matching_soup_element(lxml_elem, soup)
-                    if soup_elem and id(soup_elem) not in seen:
-                        elements.append(soup_elem)
-                        seen.add(id(soup_elem))
+                    if soup_elem:
+                        elements.setdefault(id(soup_elem), soup_elem)
             except Exception as e:
                 logger.warning(f"Invalid XPath '{xpath}': {e}")
                 warnings.append(f"Invalid XPath: {xpath}")
 
-        return elements
+        return list(elements.values())
 
     def _find_matching_soup_element(self, lxml_elem, soup: BeautifulSoup):
         """
         XPath-to-BeautifulSoup bridge: find the BS4 element that corresponds
         to an lxml element matched by XPath.
 
-        Heuristic matching strategy (most specific → least specific):
+        The soup is normally built by the same libxml2 parser as the XPath
+        tree, so elements correspond one-to-one by document position and the
+        match is exact (see _get_position_map).  If the trees differ (soup
+        from the html5lib fallback), a heuristic is used instead, most
+        specific → least specific:
         1. Match by id attribute (unique per page)
         2. Match by tag + class (usually unique enough)
         3. Fallback to first element with the same tag name
         """
+        position_map = self._get_position_map(soup)
+        if position_map:
+            return position_map.get(lxml_elem)
+
         tag = lxml_elem.tag
-        attribs = dict(lxml_elem.attrib)
+        attribs = lxml_elem.attrib
+        by_id, by_tag_class, by_tag = self._get_soup_index(soup)
 
         # Try by id first — most reliable since ids should be unique
         if 'id' in attribs:
-            found = soup.find(id=attribs['id'])
+            found = by_id.get(attribs['id'])
             if found:
                 return found
 
         # Try by tag + class combination
         if 'class' in attribs:
-            found = soup.find(tag, class_=attribs['class'])
+            found = by_tag_class.get((tag, attribs['class']))
             if found:
                 return found
 
         # Last resort: first matching tag (may be wrong if many exist)
-        candidates = soup.find_all(tag)
-        return candidates[0] if candidates else None
+        return by_tag.get(tag)
+
+    def _get_position_map(self, soup: BeautifulSoup) -> dict:
+        """
+        Map each element of the XPath tree to the soup element at the same
+        document position, or return {} if the two trees don't line up.
+        """
+        if self._position_map is None:
+            lxml_nodes = [e for e in self._xpath_tree.iter() if isinstance(e.tag, str)]
+            soup_nodes = soup.find_all(True)
+            if len(lxml_nodes) == len(soup_nodes) and \
+                    all(a.tag == b.name for a, b in zip(lxml_nodes, soup_nodes)):
+                # lxml returns the same proxy object for a node while a
+                # reference to it is alive, so the proxies work as dict keys
+                self._position_map = dict(zip(lxml_nodes, soup_nodes))
+            else:
+                logger.debug("XPath tree and soup differ, using heuristic element matching")
+                self._position_map = {}
+        return self._position_map
+
+    def _get_soup_index(self, soup: BeautifulSoup) -> tuple[dict, dict, dict]:
+        """
+        Index the soup for _find_matching_soup_element() in one traversal.
+
+        Replaces a soup.find()/find_all() scan per XPath match.  Each table
+        keeps the first element in document order, like find() did:
+          - id → element
+          - (tag, class) → element, where class is either the full class
+            attribute or any single class (find(tag, class_=...) semantics)
+          - tag → element
+        """
+        if self._soup_index is None:
+            by_id, by_tag_class, by_tag = {}, {}, {}
+            for elem in soup.find_all(True):
+                by_tag.setdefault(elem.name, elem)
+                elem_id = elem.get('id')
+                if elem_id is not None:
+                    by_id.setdefault(elem_id, elem)
+                classes = elem.get('class')
+                if classes is not None:
+                    by_tag_class.setdefault((elem.name, ' '.join(classes)), elem)
+                    for cls in classes:
+                        by_tag_class.setdefault((elem.name, cls), elem)
+            self._soup_index = (by_id, by_tag_class, by_tag)
+        return self._soup_index
 
     def _build_exclusion_set(self, soup: BeautifulSoup, html: str,
                              exclude_selectors: SelectorList) -> set:
@@ -264,10 +383,9 @@ class Extractor:
 
         for elem in elements:
             excluded.add(id(elem))
-            # Walk all descendants to exclude the entire subtree
-            for desc in elem.descendants:
-                if hasattr(desc, 'name'):
-                    excluded.add(id(desc))
+            # Exclude the entire subtree; find_all(True) yields only tags,
+            # skipping the text nodes that .descendants would also produce
+            excluded.update(map(id, elem.find_all(True)))
 
         return excluded
 
@@ -276,77 +394,82 @@ class Extractor:
         """Extract content blocks from a container element."""
         blocks = []
 
-        for tag in BLOCK_TAGS:
-            for elem in container.find_all(tag):
-                # Skip excluded or already processed
-                if id(elem) in excluded or id(elem) in processed:
-                    continue
-
-                # Skip hidden elements
-                if self._is_hidden(elem):
-                    continue
+        # One traversal for all block tags; blocks come out in document order
+        for elem in container.find_all(BLOCK_TAGS):
+            # Skip excluded or already processed.  The exclusion set holds every
+            # descendant of an excluded element, so this also covers elements
+            # with an excluded ancestor — no walk up the parent chain needed.
+            if id(elem) in excluded or id(elem) in processed:
+                continue
 
-                # Skip if any parent is excluded
-                if self._has_excluded_parent(elem, excluded):
-                    continue
+            # Skip hidden elements (their links aren't standalone either)
+            if self._is_hidden(elem):
+                processed.update(id(link) for link in elem.find_all(LINK_TAGS))
+                continue
 
-                # Extract raw text and links
-                raw_text = self._get_text(elem, metadata.extraction_hints)
-                links = self._get_links(elem, excluded, metadata.extraction_hints)
+            # Extract raw text and links
+            raw_text = self._get_text(elem, metadata.extraction_hints)
+            links = self._get_links(elem, excluded, metadata.extraction_hints, processed)
 
-                # Dual-field encoding strategy:
-                #   raw_text = browser truth (mojibake preserved for debugging)
-                #   cleaned_text = encoding-corrected via _fix_encoding() + HTML garbage removed
-                cleaned_text = self._clean_text(self._fix_encoding(raw_text))
+            # Dual-field encoding strategy:
+            #   raw_text = browser truth (mojibake preserved for debugging)
+            #   cleaned_text = encoding-corrected via _fix_encoding() + HTML garbage removed
+            cleaned_text = self._clean_text(self._fix_encoding(raw_text))
 
-                # Include the block if it has any usable content (text or links)
-                if cleaned_text or raw_text.strip() or links:
-                    blocks.append(ContentBlock(
-                        tag=tag,
-                        text=cleaned_text,
-                        raw=raw_text.strip(),
-                        links=links
-                    ))
-                    processed.add(id(elem))
+            # Include the block if it has any usable content (text or links)
+            if cleaned_text or raw_text.strip() or links:
+                blocks.append(ContentBlock(
+                    tag=elem.name,
+                    text=cleaned_text,
+                    raw=raw_text.strip(),
+                    links=links
+                ))
+                processed.add(id(elem))
 
         return blocks
 
-    def _has_excluded_parent(self, elem, excluded: set) -> bool:
-        """Check if element has an excluded ancestor."""
-        for parent in elem.parents:
-            if id(parent) in excluded:
-                return True
-        return False
-
     def _get_text(self, elem, hints) -> str:
         """Extract non-link text from element (raw, before cleanup)."""
         texts = []
-
-        for child in elem.children:
-            if isinstance(child, str):
-                texts.append(child)
-            elif hasattr(child, 'name'):
-                if child.name in LINK_TAGS:
-                    continue  # Skip link text
-                if self._is_hidden(child):
-                    continue  # Skip hidden elements
-                if child.name in INLINE_TAGS:
-                    texts.append(self._get_text(child, hints))
-                if hints.include_alt_text and child.name == 'img':
-                    alt = child.get('alt', '')
-                    if alt:
-                        texts.append(f" {alt} ")
+        self._collect_text(elem, hints.include_alt_text, texts)
 
         result = ''.join(texts)
         if hints.collapse_whitespace:
-            result = re.sub(r'\s+', ' ', result)
+            # Collapsing once over the joined text gives the same result as
+            # collapsing each inline level, without the intermediate strings
+            result = WHITESPACE_PATTERN.sub(' ', result)
         return result
 
-    def _get_links(self, elem, excluded: set, hints) -> list[Link]:
-        """Extract links from element."""
+    def _collect_text(self, elem, include_alt_text: bool, texts: list) -> None:
+        """Append elem's own and inline-descendant text pieces to texts."""
+        for child in elem.children:
+            if isinstance(child, str):
+                texts.append(child)
+                continue
+            name = child.name
+            # Only inline elements and images contribute text; everything
+            # else (links, nested blocks) is skipped before the style check
+            if name in INLINE_TAGS:
+                if not self._is_hidden(child):
+                    self._collect_text(child, include_alt_text, texts)
+            elif name == 'img' and include_alt_text:
+                alt = child.get('alt', '')
+                if alt and not self._is_hidden(child):
+                    texts.append(f" {alt} ")
+
+    def _get_links(self, elem, excluded: set, hints, consumed: set = None) -> list[Link]:
+        """
+        Extract links from element.
+
+        If consumed is given, the id of every link inside elem is added to it
+        (kept or not), marking it as belonging to a block so it isn't picked
+        up again as a standalone link.
+        """
         links = []
 
         for link_elem in elem.find_all(LINK_TAGS):
+            if consumed is not None:
+                consumed.add(id(link_elem))
             if id(link_elem) in excluded:
                 continue
             if self._is_hidden(link_elem):
@@ -388,27 +511,12 @@ class Extractor:
         blocks = []
 
         for link_elem in container.find_all(LINK_TAGS):
+            # Links inside a block-level element were marked in `processed`
+            # by _extract_blocks (via _get_links), so no walk up the parents
+            # is needed to tell them apart from standalone ones.
             if id(link_elem) in excluded or id(link_elem) in processed:
                 continue
 
-            # Walk up from the link to the container boundary. If we encounter
-            # a block-level parent before reaching the container, this link is
-            # "inside a block" and was already extracted by _extract_blocks.
-            inside_block = False
-            for parent in link_elem.parents:
-                if parent == container:
-                    break
-                if parent.name in BLOCK_TAGS:
-                    inside_block = True
-                    break
-
-            if inside_block:
-                continue
-
-            # Skip if parent is excluded
-            if self._has_excluded_parent(link_elem, excluded):
-                continue
-
             href = link_elem.get('href', '').strip()
             if not href or href.startswith('javascript:') or href == '#':
                 continue
@@ -447,49 +555,39 @@ class Extractor:
         blocks = []
 
         try:
-            soup = BeautifulSoup(script_html, 'html5lib')
+            soup = _make_soup(script_html)
+            # Earlier script soups are gone and their element ids may be reused
+            self._hidden_cache = {}
             body = soup.find('body')
             if not body:
                 return blocks
 
             processed = set()
 
-            # Extract regular blocks
-            for tag in BLOCK_TAGS:
-                for elem in body.find_all(tag):
-                    if id(elem) in processed:
-                        continue
-
-                    raw_text = self._get_text(elem, metadata.extraction_hints)
-                    links = self._get_links(elem, set(), metadata.extraction_hints)
-                    cleaned_text = self._clean_text(self._fix_encoding(raw_text))
-
-                    if cleaned_text or raw_text.strip() or links:
-                        blocks.append(ContentBlock(
-                            tag=f"script:{tag}",  # Mark as script-generated
-                            text=cleaned_text,
-                            raw=raw_text.strip(),
-                            links=links
-                        ))
-                        processed.add(id(elem))
+            # Extract regular blocks (single traversal, document order)
+            for elem in body.find_all(BLOCK_TAGS):
+                if id(elem) in processed:
+                    continue
+
+                raw_text = self._get_text(elem, metadata.extraction_hints)
+                links = self._get_links(elem, set(), metadata.extraction_hints, processed)
+                cleaned_text = self._clean_text(self._fix_encoding(raw_text))
+
+                if cleaned_text or raw_text.strip() or links:
+                    blocks.append(ContentBlock(
+                        tag=f"script:{elem.name}",  # Mark as script-generated
+                        text=cleaned_text,
+                        raw=raw_text.strip(),
+                        links=links
+                    ))
+                    processed.add(id(elem))
 
             # Extract standalone links from script content
             for link_elem in body.find_all(LINK_TAGS):
+                # Links inside blocks were marked by _get_links above
                 if id(link_elem) in processed:
                     continue
 
-                # Check if inside a block element (body boundary first)
-                inside_block = False
-                for parent in link_elem.parents:
-                    if parent == body:
-                        break
-                    if parent.name in BLOCK_TAGS:
-                        inside_block = True
-                        break
-
-                if inside_block:
-                    continue
-
                 href = link_elem.get('href', '').strip()
                 if not href or href.startswith('javascript:') or href == '#':
                     continue
@@ -515,3 +613,31 @@ def extract(html: str, metadata: Metadata, script_content: list[str] = None,
             declared_charset: str = None) -> ExtractionResult:
     """Convenience function to extract content from HTML."""
     return Extractor().extract(html, metadata, script_content, declared_charset=declared_charset)
+
+
+def _extract_args(args: tuple) -> ExtractionResult:
+    """Top-level (picklable) worker for extract_many()."""
+    return extract(*args)
+
+
+def extract_many(documents: list[tuple], workers: Optional[int] = None) -> list[ExtractionResult]:
+    """
+    Extract many documents in parallel worker processes.
+
+    Extraction is CPU-bound (parsing, tree walks, regex) and documents share
+    no state, so separate processes sidestep the GIL and scale with cores.
+
+    Args:
+        documents: One tuple of extract() arguments per document:
+                   (html, metadata[, script_content[, declared_charset]])
+        workers: Number of processes (None = os.cpu_count())
+
+    Returns:
+        ExtractionResults in the same order as documents
+    """
+    documents = list(documents)
+    # Process startup costs more than a single extraction saves
+    if len(documents) < 2 or workers == 1:
+        return [_extract_args(args) for args in documents]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_extract_args, documents))
@@ -0,0 +1,119 @@
+"""
+JSON helpers that use orjson when it is installed.
+
+orjson is a Rust JSON library, 2–5x faster than the stdlib `json` module on
+both encode and decode.  It's optional: without it these helpers fall back
+to `json` and produce equivalent output, so callers never need to care
+which backend is active.
+"""
+
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional, Union
+
+# Optional dependency: pip install orjson
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Both backends raise a ValueError subclass on malformed input
+# (orjson.JSONDecodeError subclasses json.JSONDecodeError).
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize to a JSON string.
+
+    Non-ASCII characters are written as-is (like ensure_ascii=False).
+
+    Args:
+        obj: JSON-serializable object
+        indent: Pretty-print with 2-space indentation
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False,
+                      separators=None if indent else (",", ":"))
+
+
+# --- Incremental array decoding ---
+# orjson has no partial-input API, so streaming uses the stdlib decoder's
+# raw_decode(), which parses one value starting at an offset.
+
+_decoder = json.JSONDecoder()
+
+# A top-level array, optionally inside a ```json fence
+_BARE_ARRAY_RE = re.compile(r"\s*(?:```(?:json)?\s*)?\[")
+_WS_COMMA = " \t\r\n,"
+
+
+def _array_start(buf: str, key_re: Optional[re.Pattern]) -> Optional[int]:
+    """Offset just past the '[' that opens the items array, if seen yet."""
+    if key_re is not None:
+        match = key_re.search(buf)
+        if match:
+            return match.end()
+    match = _BARE_ARRAY_RE.match(buf)
+    return match.end() if match else None
+
+
+def iter_array_items(chunks: Iterable[str], key: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield the items of a JSON array as soon as each one is complete.
+
+    The array is either the value of `key` inside the top-level object
+    ({"documents": [...]}) or the top-level value itself.  Only the unparsed
+    tail of the input is kept, so memory stays around one item rather than
+    the whole response.
+
+    Args:
+        chunks: Text fragments of the JSON document (e.g. streamed LLM deltas)
+        key: Object key holding the array; None = top-level array only
+
+    Raises:
+        JSONDecodeError: If the stream ends before the array is closed
+    """
+    # Compiled once here rather than looked up per chunk in re's cache
+    key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) if key is not None else None
+    buf = ""
+    pos = None  # index of the next unparsed item in buf
+    for chunk in chunks:
+        buf += chunk
+        if pos is None:
+            pos = _array_start(buf, key_re)
+            if pos is None:
+                continue
+        elif not any(c in chunk for c in ",]}"):
+            # No value can have been completed by this chunk
+            continue
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WS_COMMA:
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except JSONDecodeError:
+                break  # item not complete yet
+            if end == len(buf) and not isinstance(item, (dict, list)):
+                break  # a scalar may still be growing ("12" → "123")
+            yield item
+            pos = end
+
+        buf, pos = buf[pos:], 0
+
+    if pos is None:
+        raise JSONDecodeError("No JSON array found in response", buf, 0)
+    raise JSONDecodeError("Unterminated JSON array in response", buf, pos)
@@ -7,17 +7,58 @@ so the Analyzer doesn't need to know which LLM is behind the call.
 """
 
 import os
-import json
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Iterator, Optional, Union
 from enum import Enum
 
+from . import fast_json
 from .logger import get_module_logger
 from .exceptions import LLMClientError
+from .rate_limiter import estimate_tokens
 
 logger = get_module_logger("llm_client")
 
 
+def _strip_code_fences(text: str) -> str:
+    """Remove a markdown code fence (```json ... ```) wrapped around a response."""
+    return (text.strip()
+            .removeprefix("```json").removeprefix("```").removesuffix("```")
+            .strip())
+
+
+# Both providers give a batch 24 hours to finish; the extra margin covers
+# expiry and cancellation taking a while to show up in the batch status.
+DEFAULT_BATCH_TIMEOUT = 26 * 60 * 60.0
+
+# Anthropic ignores cache_control on a prefix shorter than this (1024 for
+# Sonnet/Opus; Haiku needs more), so a breakpoint below it only adds noise.
+ANTHROPIC_MIN_CACHEABLE_TOKENS = 1024
+
+
+def _wait_for_batch(batch, retrieve, finished, poll_interval: float,
+                    timeout: Optional[float], provider: str):
+    """
+    Poll a batch job until finished(batch) is true and return its last state.
+
+    Raises:
+        LLMClientError: If the batch is still running after `timeout` seconds
+                        (None = wait indefinitely)
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not finished(batch):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise LLMClientError(
+                f"Batch {batch.id} did not finish within {timeout:.0f}s",
+                provider=provider,
+                details={"batch_id": batch.id}
+            )
+        wait = poll_interval if deadline is None else min(poll_interval, deadline - time.monotonic())
+        time.sleep(max(wait, 0))
+        batch = retrieve(batch.id)
+    return batch
+
+
 class LLMProvider(Enum):
     """Supported LLM providers."""
     OPENAI = "openai"
@@ -28,13 +69,21 @@ class BaseLLMClient(ABC):
     """Abstract base class for LLM clients."""
 
     @abstractmethod
-    def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> str:
         """
         Send a prompt to the LLM and return the response.
 
         Args:
             prompt: The user prompt
             system_prompt: Optional system prompt
+            cacheable_prefix: Leading part of prompt that is identical across
+                              calls; providers with prompt caching may bill
+                              it at a discount.  Purely an optimization hint.
 
         Returns:
             The LLM's response text
@@ -42,19 +91,159 @@ class BaseLLMClient(ABC):
         pass
 
     @abstractmethod
-    def complete_json(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+    def complete_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> dict:
         """
         Send a prompt and parse the response as JSON.
 
         Args:
             prompt: The user prompt
             system_prompt: Optional system prompt
+            cacheable_prefix: See complete()
 
         Returns:
             Parsed JSON response as dict
         """
         pass
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_mode: bool = False,
+        cacheable_prefix: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Send a prompt and yield the response text as it arrives.
+
+        The default implementation doesn't stream: it makes one blocking call
+        and yields the whole response, so clients that only implement
+        complete()/complete_json() still work with the streaming helpers.
+
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            json_mode: Ask the provider for a JSON response
+            cacheable_prefix: See complete()
+        """
+        if json_mode:
+            yield fast_json.dumps(self.complete_json(prompt, system_prompt,
+                                                     cacheable_prefix=cacheable_prefix))
+        else:
+            yield self.complete(prompt, system_prompt, cacheable_prefix=cacheable_prefix)
+
+    def complete_json_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        array_key: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> Iterator[Any]:
+        """
+        Stream a JSON response and yield its array items one by one.
+
+        Each item is yielded as soon as it has fully arrived, so callers can
+        act on the first results while the rest is still being generated,
+        and the full response is never held in memory at once.
+
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            array_key: Key of the array inside the response object
+                       ({"documents": [...]}); None = top-level array
+            cacheable_prefix: See complete()
+
+        Raises:
+            LLMClientError: If the response isn't a (complete) JSON array
+        """
+        try:
+            yield from fast_json.iter_array_items(
+                self.complete_stream(prompt, system_prompt, json_mode=True,
+                                     cacheable_prefix=cacheable_prefix),
+                array_key
+            )
+        except fast_json.JSONDecodeError as e:
+            logger.error(f"Failed to parse streamed response as JSON: {e}")
+            raise LLMClientError(
+                f"Failed to parse streamed response as JSON: {str(e)}",
+                provider=type(self).__name__
+            )
+
+    def complete_json_batch(
+        self,
+        prompts: list[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT
+    ) -> list[Union[dict, LLMClientError]]:
+        """
+        Run many JSON prompts through the provider's offline batch API.
+
+        Batch APIs finish within hours rather than seconds but cost about
+        half as much per token, which suits overnight corpus runs.  Results
+        come back in prompt order; a prompt that failed holds its
+        LLMClientError, so one bad response doesn't sink the batch.
+
+        The default sends the prompts one by one with complete_json(), so
+        clients without a batch API still work.
+
+        Args:
+            prompts: User prompts, one per request
+            system_prompt: System prompt shared by every request
+            poll_interval: Seconds between batch status checks
+            timeout: Seconds to wait for the batch before giving up
+                     (None = wait indefinitely)
+
+        Raises:
+            LLMClientError: If the batch itself could not be submitted or run,
+                            or did not finish within `timeout`
+        """
+        results: list[Union[dict, LLMClientError]] = []
+        for prompt in prompts:
+            try:
+                results.append(self.complete_json(prompt, system_prompt))
+            except LLMClientError as e:
+                results.append(e)
+        return results
+
+    def complete_tools(
+        self,
+        prompt: str,
+        tools: list[dict],
+        system_prompt: Optional[str] = None
+    ) -> list[tuple[str, dict]]:
+        """
+        Send a prompt with callable tools and return the tool calls made.
+
+        The model may call several tools in one response (parallel tool
+        calls); all of them are returned, in the order the model emitted them.
+
+        Args:
+            prompt: The user prompt
+            tools: Tool definitions, each {"name", "description", "parameters"}
+                   where parameters is a JSON Schema object
+            system_prompt: Optional system prompt
+
+        Returns:
+            (tool name, parsed arguments) for each tool call
+
+        Raises:
+            NotImplementedError: If the client doesn't support tool calls
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support tool calls")
+
+    def warm_up(self) -> None:
+        """
+        Open a connection to the provider ahead of the first real call.
+
+        The first request otherwise pays the TCP+TLS handshake.  Best effort:
+        the default does nothing, and failures are only logged.
+        """
+
 
 class OpenAIClient(BaseLLMClient):
     """OpenAI API client."""
@@ -83,7 +272,16 @@ class OpenAIClient(BaseLLMClient):
                 provider="openai"
             )
 
-    def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    # OpenAI caches repeated prompt prefixes automatically, so
+    # cacheable_prefix needs no special handling here: callers only have to
+    # keep the static text at the start of the prompt.
+
+    def complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> str:
         """Send prompt to OpenAI and return response."""
         messages = []
 
@@ -109,7 +307,12 @@ class OpenAIClient(BaseLLMClient):
                 details={"error": str(e)}
             )
 
-    def complete_json(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+    def complete_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> dict:
         """Send prompt to OpenAI and parse JSON response."""
         messages = []
 
@@ -126,8 +329,8 @@ class OpenAIClient(BaseLLMClient):
                 response_format={"type": "json_object"}
             )
             content = response.choices[0].message.content
-            return json.loads(content)
-        except json.JSONDecodeError as e:
+            return fast_json.loads(content)
+        except fast_json.JSONDecodeError as e:
             logger.error(f"Failed to parse OpenAI response as JSON: {e}")
             raise LLMClientError(
                 f"Failed to parse response as JSON: {str(e)}",
@@ -143,6 +346,186 @@ class OpenAIClient(BaseLLMClient):
             )
 
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_mode: bool = False,
+        cacheable_prefix: Optional[str] = None
+    ) -> Iterator[str]:
+        """Send prompt to OpenAI and yield the response text as it streams in."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.append({"role": "user", "content": prompt})
+
+        kwargs = {"model": self.model, "messages": messages, "temperature": 0.1, "stream": True}
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+
+        try:
+            for chunk in self.client.chat.completions.create(**kwargs):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise LLMClientError(
+                f"OpenAI API call failed: {str(e)}",
+                provider="openai",
+                details={"error": str(e)}
+            )
+
+    def complete_tools(
+        self,
+        prompt: str,
+        tools: list[dict],
+        system_prompt: Optional[str] = None
+    ) -> list[tuple[str, dict]]:
+        """Send prompt to OpenAI with tools; returns the (parallel) tool calls."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.append({"role": "user", "content": prompt})
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.1,
+                tools=[{"type": "function", "function": tool} for tool in tools],
+                tool_choice="auto",
+                parallel_tool_calls=True
+            )
+            tool_calls = response.choices[0].message.tool_calls or []
+            return [(call.function.name, fast_json.loads(call.function.arguments))
+                    for call in tool_calls]
+        except fast_json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OpenAI tool arguments as JSON: {e}")
+            raise LLMClientError(
+                f"Failed to parse tool arguments as JSON: {str(e)}",
+                provider="openai"
+            )
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise LLMClientError(
+                f"OpenAI API call failed: {str(e)}",
+                provider="openai",
+                details={"error": str(e)}
+            )
+
+    def complete_json_batch(
+        self,
+        prompts: list[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT
+    ) -> list[Union[dict, LLMClientError]]:
+        """Run JSON prompts through the OpenAI Batch API (see BaseLLMClient)."""
+        lines = []
+        for i, prompt in enumerate(prompts):
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            lines.append(fast_json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.1,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
+
+        try:
+            batch_file = self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted OpenAI batch {batch.id} ({len(prompts)} requests)")
+            batch = _wait_for_batch(
+                batch, self.client.batches.retrieve,
+                lambda b: b.status in ("completed", "failed", "expired", "cancelled"),
+                poll_interval, timeout, provider="openai"
+            )
+            # An expired batch still returns whatever finished in time
+            output = self.client.files.content(batch.output_file_id).text \
+                if batch.output_file_id else ""
+        except LLMClientError:
+            raise
+        except Exception as e:
+            logger.error(f"OpenAI batch error: {e}")
+            raise LLMClientError(
+                f"OpenAI batch failed: {str(e)}",
+                provider="openai",
+                details={"error": str(e)}
+            )
+
+        results: list[Union[dict, LLMClientError]] = [
+            LLMClientError(f"No result in OpenAI batch {batch.id} ({batch.status})",
+                           provider="openai")
+            for _ in prompts
+        ]
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            # One malformed line must not sink the rest of the batch: a line
+            # we can't map back to a prompt is skipped (that prompt keeps its
+            # "no result" error), otherwise the error goes to its own slot.
+            try:
+                record = fast_json.loads(line)
+                i = int(record["custom_id"])
+                if not 0 <= i < len(prompts):
+                    raise ValueError(f"custom_id {i} out of range")
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping malformed line in OpenAI batch {batch.id} output: {e}")
+                continue
+            try:
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    results[i] = LLMClientError(
+                        "OpenAI batch request failed",
+                        provider="openai",
+                        details={"error": record.get("error") or response.get("body")}
+                    )
+                    continue
+                content = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError, AttributeError) as e:
+                results[i] = LLMClientError(
+                    f"Malformed OpenAI batch result: {e!r}",
+                    provider="openai",
+                    details={"record": record}
+                )
+                continue
+            try:
+                results[i] = fast_json.loads(content)
+            except (fast_json.JSONDecodeError, TypeError) as e:
+                results[i] = LLMClientError(
+                    f"Failed to parse response as JSON: {str(e)}",
+                    provider="openai",
+                    details={"response": content}
+                )
+        return results
+
+    def warm_up(self) -> None:
+        """Open the pooled connection with a token-free model lookup."""
+        try:
+            self.client.models.retrieve(self.model)
+        except Exception as e:
+            logger.debug(f"OpenAI warm-up failed: {e}")
+
+
 class AnthropicClient(BaseLLMClient):
     """Anthropic API client."""
 
@@ -170,18 +553,47 @@ class AnthropicClient(BaseLLMClient):
                 provider="anthropic"
             )
 
-    def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Send prompt to Anthropic and return response."""
-        try:
-            kwargs = {
-                "model": self.model,
-                "max_tokens": 4096,
-                "messages": [{"role": "user", "content": prompt}]
-            }
+    def _message_kwargs(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        cacheable_prefix: Optional[str]
+    ) -> dict:
+        """Build messages.create() arguments, marking the cacheable prefix."""
+        content = prompt
+        cacheable_tokens = (estimate_tokens(system_prompt or "")
+                            + estimate_tokens(cacheable_prefix or ""))
+        if (cacheable_prefix and prompt.startswith(cacheable_prefix)
+                and cacheable_tokens >= ANTHROPIC_MIN_CACHEABLE_TOKENS):
+            # Anthropic caches everything up to a cache_control breakpoint
+            # (system prompt included), so one breakpoint after the static
+            # prefix covers both.  The analyzer's own prompts are well under
+            # the minimum, so they are sent as plain text.
+            content = [
+                {"type": "text", "text": cacheable_prefix,
+                 "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt[len(cacheable_prefix):]}
+            ]
+
+        kwargs = {
+            "model": self.model,
+            "max_tokens": 4096,
+            "messages": [{"role": "user", "content": content}]
+        }
 
-            if system_prompt:
-                kwargs["system"] = system_prompt
+        if system_prompt:
+            kwargs["system"] = system_prompt
+        return kwargs
 
+    def complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> str:
+        """Send prompt to Anthropic and return response."""
+        try:
+            kwargs = self._message_kwargs(prompt, system_prompt, cacheable_prefix)
             response = self.client.messages.create(**kwargs)
             return response.content[0].text
         except Exception as e:
@@ -192,7 +604,12 @@ class AnthropicClient(BaseLLMClient):
                 details={"error": str(e)}
             )
 
-    def complete_json(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+    def complete_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_prefix: Optional[str] = None
+    ) -> dict:
         """Send prompt to Anthropic and parse JSON response."""
         # Anthropic doesn't have a native JSON response mode like OpenAI's
         # response_format={"type": "json_object"}, so we add an explicit
@@ -200,20 +617,13 @@ class AnthropicClient(BaseLLMClient):
         json_prompt = f"{prompt}\n\nRespond with valid JSON only, no additional text."
 
         try:
-            response_text = self.complete(json_prompt, system_prompt)
+            response_text = self.complete(json_prompt, system_prompt,
+                                          cacheable_prefix=cacheable_prefix)
 
             # Anthropic models often wrap JSON in markdown code fences (```json ... ```).
             # Strip those wrappers before parsing.
-            text = response_text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-
-            return json.loads(text.strip())
-        except json.JSONDecodeError as e:
+            return fast_json.loads(_strip_code_fences(response_text))
+        except fast_json.JSONDecodeError as e:
             logger.error(f"Failed to parse Anthropic response as JSON: {e}")
             raise LLMClientError(
                 f"Failed to parse response as JSON: {str(e)}",
@@ -222,6 +632,147 @@ class AnthropicClient(BaseLLMClient):
             )
 
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_mode: bool = False,
+        cacheable_prefix: Optional[str] = None
+    ) -> Iterator[str]:
+        """Send prompt to Anthropic and yield the response text as it streams in."""
+        if json_mode:
+            # Same explicit instruction as complete_json(); code fences are
+            # tolerated by the streaming JSON parser.
+            prompt = f"{prompt}\n\nRespond with valid JSON only, no additional text."
+
+        kwargs = self._message_kwargs(prompt, system_prompt, cacheable_prefix)
+
+        try:
+            with self.client.messages.stream(**kwargs) as stream:
+                yield from stream.text_stream
+        except Exception as e:
+            logger.error(f"Anthropic API error: {e}")
+            raise LLMClientError(
+                f"Anthropic API call failed: {str(e)}",
+                provider="anthropic",
+                details={"error": str(e)}
+            )
+
+    def complete_tools(
+        self,
+        prompt: str,
+        tools: list[dict],
+        system_prompt: Optional[str] = None
+    ) -> list[tuple[str, dict]]:
+        """Send prompt to Anthropic with tools; returns the (parallel) tool calls."""
+        try:
+            kwargs = {
+                "model": self.model,
+                "max_tokens": 4096,
+                "messages": [{"role": "user", "content": prompt}],
+                # Anthropic names the JSON Schema "input_schema"
+                "tools": [
+                    {"name": t["name"], "description": t["description"],
+                     "input_schema": t["parameters"]}
+                    for t in tools
+                ],
+                "tool_choice": {"type": "auto"}
+            }
+
+            if system_prompt:
+                kwargs["system"] = system_prompt
+
+            response = self.client.messages.create(**kwargs)
+            # Tool arguments arrive already parsed as dicts
+            return [(block.name, block.input) for block in response.content
+                    if block.type == "tool_use"]
+        except Exception as e:
+            logger.error(f"Anthropic API error: {e}")
+            raise LLMClientError(
+                f"Anthropic API call failed: {str(e)}",
+                provider="anthropic",
+                details={"error": str(e)}
+            )
+
+    def complete_json_batch(
+        self,
+        prompts: list[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT
+    ) -> list[Union[dict, LLMClientError]]:
+        """Run JSON prompts through the Message Batches API (see BaseLLMClient)."""
+        requests = [
+            {"custom_id": str(i),
+             "params": self._message_kwargs(
+                 f"{prompt}\n\nRespond with valid JSON only, no additional text.",
+                 system_prompt, None)}
+            for i, prompt in enumerate(prompts)
+        ]
+
+        try:
+            batch = self.client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted Anthropic batch {batch.id} ({len(prompts)} requests)")
+            batch = _wait_for_batch(
+                batch, self.client.messages.batches.retrieve,
+                lambda b: b.processing_status == "ended",
+                poll_interval, timeout, provider="anthropic"
+            )
+            entries = list(self.client.messages.batches.results(batch.id))
+        except LLMClientError:
+            raise
+        except Exception as e:
+            logger.error(f"Anthropic batch error: {e}")
+            raise LLMClientError(
+                f"Anthropic batch failed: {str(e)}",
+                provider="anthropic",
+                details={"error": str(e)}
+            )
+
+        results: list[Union[dict, LLMClientError]] = [
+            LLMClientError(f"No result in Anthropic batch {batch.id}", provider="anthropic")
+            for _ in prompts
+        ]
+        for entry in entries:
+            try:
+                i = int(entry.custom_id)
+                if not 0 <= i < len(prompts):
+                    raise ValueError(f"custom_id {i} out of range")
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"Skipping malformed entry in Anthropic batch {batch.id} results: {e}")
+                continue
+            try:
+                if entry.result.type != "succeeded":
+                    results[i] = LLMClientError(
+                        f"Anthropic batch request {entry.result.type}",
+                        provider="anthropic"
+                    )
+                    continue
+                response_text = entry.result.message.content[0].text
+            except (IndexError, AttributeError) as e:
+                results[i] = LLMClientError(
+                    f"Malformed Anthropic batch result: {e!r}",
+                    provider="anthropic"
+                )
+                continue
+            try:
+                results[i] = fast_json.loads(_strip_code_fences(response_text))
+            except fast_json.JSONDecodeError as e:
+                results[i] = LLMClientError(
+                    f"Failed to parse response as JSON: {str(e)}",
+                    provider="anthropic",
+                    details={"response": response_text}
+                )
+        return results
+
+    def warm_up(self) -> None:
+        """Open the pooled connection with a token-free model lookup."""
+        try:
+            self.client.models.retrieve(self.model)
+        except Exception as e:
+            logger.debug(f"Anthropic warm-up failed: {e}")
+
+
 class LLMClient:
     """
     Factory class for creating LLM clients with provider switch.
@@ -233,10 +784,17 @@ class LLMClient:
         # Explicit provider
         client = LLMClient.create(provider=LLMProvider.OPENAI)
         client = LLMClient.create(provider=LLMProvider.ANTHROPIC)
+
+    Clients are shared per (provider, api_key, model): each SDK client keeps
+    an HTTP connection pool, so reusing it saves a TCP+TLS handshake on the
+    first call of every new Analyzer/HTMLParser.
     """
 
-    @staticmethod
+    _clients: dict[tuple, BaseLLMClient] = {}
+
+    @classmethod
     def create(
+        cls,
         provider: Optional[LLMProvider] = None,
         api_key: Optional[str] = None,
         model: Optional[str] = None
@@ -250,7 +808,8 @@ class LLMClient:
             model: Model name (defaults to provider-specific default)
 
         Returns:
-            Configured LLM client
+            Configured LLM client (shared with earlier calls that used the
+            same provider, key and model)
         """
         # Resolve provider: explicit arg > env var > default to OpenAI
         if provider is None:
@@ -263,6 +822,12 @@ class LLMClient:
                 )
                 provider = LLMProvider.OPENAI
 
+        # Key on the resolved API key so a changed env var gets a new client
+        key = (provider, api_key or os.getenv(f"{provider.name}_API_KEY"), model)
+        client = cls._clients.get(key)
+        if client is not None:
+            return client
+
         logger.info(f"Creating LLM client for provider: {provider.value}")
 
         # Dispatch to the appropriate concrete client.
@@ -271,16 +836,19 @@ class LLMClient:
             kwargs = {"api_key": api_key}
             if model:
                 kwargs["model"] = model
-            return OpenAIClient(**kwargs)
+            client = OpenAIClient(**kwargs)
 
         elif provider == LLMProvider.ANTHROPIC:
             kwargs = {"api_key": api_key}
             if model:
                 kwargs["model"] = model
-            return AnthropicClient(**kwargs)
+            client = AnthropicClient(**kwargs)
 
         else:
             raise LLMClientError(
                 f"Unsupported provider: {provider}",
                 provider=str(provider)
             )
+
+        cls._clients[key] = client
+        return client
@@ -26,8 +26,12 @@ def setup_logger(
     logger = logging.getLogger(name)
 
     # Avoid adding handlers multiple times (setup_logger can be called repeatedly
-    # by different modules or when changing log level at runtime)
+    # by different modules or when changing log level at runtime); a repeat
+    # call still applies the requested level.
     if logger.handlers:
+        logger.setLevel(level)
+        for handler in logger.handlers:
+            handler.setLevel(level)
         return logger
 
     logger.setLevel(level)
@@ -54,17 +58,18 @@ def setup_logger(
     return logger
 
 
-# Default logger instance — created once at import time
-logger = setup_logger()
-
-
 def get_module_logger(module_name: str) -> logging.Logger:
     """
     Get a child logger for a specific module.
 
-    Child loggers (e.g. "html_parser.analyzer") inherit the root logger's
-    handlers and level, but their name appears in log output so you can
-    tell which pipeline stage produced each message without extra config.
+    Child loggers (e.g. "html_parser.analyzer") propagate to the package
+    logger, but their name appears in log output so you can tell which
+    pipeline stage produced each message without extra config.
+
+    Safe to call at import time: it installs no handlers.  Output is
+    configured by setup_logger(), which HTMLParser and the run_*.py CLIs
+    call when they start; until then, warnings and errors still reach
+    stderr through logging's last-resort handler.
 
     Args:
         module_name: Name of the module (e.g., 'analyzer', 'extractor')
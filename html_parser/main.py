@@ -6,7 +6,10 @@ This module wires the stages together and manages charset propagation so
 each stage uses the correct encoding information.
 """
 
+import asyncio
 import json
+import logging
+import threading
 from pathlib import Path
 from typing import Optional, Union
 
@@ -14,7 +17,7 @@ from .preprocessor import Preprocessor
 from .analyzer import Analyzer
 from .extractor import Extractor
 from .schemas import Metadata, ExtractionResult
-from .llm_client import LLMProvider, BaseLLMClient
+from .llm_client import LLMProvider, BaseLLMClient, DEFAULT_BATCH_TIMEOUT
 from .exceptions import AnalysisError
 from .logger import get_module_logger, setup_logger
 
@@ -35,15 +38,27 @@ class HTMLParser:
         self,
         provider: Optional[LLMProvider] = None,
         llm_client: Optional[BaseLLMClient] = None,
-        log_level: int = None
+        log_level: int = None,
+        warm_up: bool = False
     ):
+        # The package log handler is attached here, when the pipeline is
+        # actually used, rather than as a side effect of importing it.
+        # Without an explicit log_level, a level set earlier is kept.
         if log_level is not None:
             setup_logger(level=log_level)
+        elif not logging.getLogger("html_parser").handlers:
+            setup_logger()
 
         self.preprocessor = Preprocessor()
         self.analyzer = Analyzer(llm_client=llm_client, provider=provider)
         self.extractor = Extractor()
 
+        # Open the LLM connection in the background so the first parse()
+        # doesn't pay the TCP+TLS handshake.  Off by default: runs served
+        # from the metadata cache never need a client at all.
+        if warm_up:
+            threading.Thread(target=self.analyzer.warm_up, daemon=True).start()
+
         logger.info(f"HTMLParser initialized")
 
     def parse(
@@ -82,6 +97,69 @@ class HTMLParser:
         )
 
         # Stage 3: Extract (rule-based, no LLM)
+        result = self._extract(preprocessed, metadata)
+
+        logger.info(f"Complete: {len(result.blocks)} blocks")
+        return result
+
+    async def aparse_many(
+        self,
+        htmls: list[str],
+        source_names: Optional[list[Optional[str]]] = None,
+        declared_charsets: Optional[list[Optional[str]]] = None,
+        force_refresh: bool = False,
+        max_concurrency: int = 10,
+        max_rpm: Optional[int] = 500,
+        max_tpm: Optional[int] = None
+    ) -> list[Union[ExtractionResult, AnalysisError]]:
+        """
+        Parse many HTML documents, overlapping their LLM calls.
+
+        The pipeline is dominated by LLM round-trips, so documents are
+        preprocessed in worker threads and then analyzed concurrently through
+        Analyzer.aanalyze_many() (bounded concurrency, shared RPM/TPM limiter).
+        Extraction is CPU-bound and runs once the metadata is in.
+
+        Returns:
+            Results in input order; a document whose analysis failed holds its
+            AnalysisError in place of an ExtractionResult
+        """
+        if declared_charsets is None:
+            declared_charsets = [None] * len(htmls)
+        if len(declared_charsets) != len(htmls):
+            raise ValueError("declared_charsets must match htmls in length")
+
+        logger.info(f"Starting pipeline for {len(htmls)} documents")
+
+        # Stage 1: Preprocess (html5lib parsing, off the event loop)
+        preprocessed_results = await asyncio.gather(*(
+            asyncio.to_thread(self.preprocessor.process, html, declared_charset=charset)
+            for html, charset in zip(htmls, declared_charsets)
+        ))
+
+        # Stage 2: Analyze concurrently (LLM calls, cached)
+        analyses = await self.analyzer.aanalyze_many(
+            preprocessed_results,
+            source_names=source_names,
+            force_refresh=force_refresh,
+            max_concurrency=max_concurrency,
+            max_rpm=max_rpm,
+            max_tpm=max_tpm
+        )
+
+        # Stage 3: Extract
+        results = []
+        for preprocessed, metadata in zip(preprocessed_results, analyses):
+            if isinstance(metadata, AnalysisError):
+                results.append(metadata)
+            else:
+                results.append(self._extract(preprocessed, metadata))
+
+        logger.info(f"Complete: {len(results)} documents")
+        return results
+
+    def _extract(self, preprocessed: dict, metadata: Metadata) -> ExtractionResult:
+        """Run the Extractor on one preprocessed document."""
         # Input:  normalized_html + Metadata + declared charset for encoding repair
         # Output: ExtractionResult with ContentBlock list
         # The declared charset flows from Preprocessor → Extractor so _fix_encoding()
@@ -93,8 +171,6 @@ class HTMLParser:
         # Merge preprocessing warnings into the final result so the caller
         # sees all issues from every pipeline stage in one place.
         result.warnings.extend(preprocessed.get("warnings", []))
-
-        logger.info(f"Complete: {len(result.blocks)} blocks")
         return result
 
     def parse_file(
@@ -104,13 +180,7 @@ class HTMLParser:
     ) -> ExtractionResult:
         """Parse an HTML file."""
         file_path = Path(file_path)
-
-        # Read as raw bytes so we can detect the charset from <meta> tags
-        # *before* decoding.  This ensures we decode with the charset the
-        # page actually declared (after WHATWG mapping), not just UTF-8.
-        raw_bytes = file_path.read_bytes()
-        declared_charset = Preprocessor.detect_charset_from_bytes(raw_bytes)
-        html = raw_bytes.decode(declared_charset, errors='replace')
+        html, declared_charset = _read_html(file_path)
 
         # Pass declared_charset through so the Extractor can use it for
         # encoding repair in _fix_encoding().
@@ -118,6 +188,52 @@ class HTMLParser:
                          force_refresh=force_refresh,
                          declared_charset=declared_charset)
 
+    def parse_many_batch(
+        self,
+        file_paths: list[Union[str, Path]],
+        force_refresh: bool = False,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT
+    ) -> list[Union[ExtractionResult, AnalysisError]]:
+        """
+        Parse many HTML files, analyzing cache misses via the LLM batch API.
+
+        For offline corpus runs: the batch job can take hours, but costs
+        about half as much as per-file calls.  Results are in input order; a
+        file whose analysis failed holds its AnalysisError.  A batch still
+        running after `timeout` seconds raises AnalysisError.
+        """
+        paths = [Path(p) for p in file_paths]
+        preprocessed_results = []
+        for path in paths:
+            html, declared_charset = _read_html(path)
+            preprocessed_results.append(
+                self.preprocessor.process(html, declared_charset=declared_charset))
+
+        analyses = self.analyzer.analyze_many_offline(
+            preprocessed_results,
+            source_names=[path.stem for path in paths],
+            force_refresh=force_refresh,
+            poll_interval=poll_interval,
+            timeout=timeout
+        )
+
+        return [
+            metadata if isinstance(metadata, AnalysisError)
+            else self._extract(preprocessed, metadata)
+            for preprocessed, metadata in zip(preprocessed_results, analyses)
+        ]
+
+
+def _read_html(file_path: Path) -> tuple[str, str]:
+    """Read an HTML file, decoding it with the charset it declares."""
+    # Read as raw bytes so we can detect the charset from <meta> tags
+    # *before* decoding.  This ensures we decode with the charset the
+    # page actually declared (after WHATWG mapping), not just UTF-8.
+    raw_bytes = file_path.read_bytes()
+    declared_charset = Preprocessor.detect_charset_from_bytes(raw_bytes)
+    return raw_bytes.decode(declared_charset, errors='replace'), declared_charset
+
 
 def parse_html(html: str, provider: Optional[LLMProvider] = None) -> ExtractionResult:
     """Convenience function to parse HTML."""
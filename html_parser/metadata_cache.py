@@ -6,19 +6,153 @@ Benefits:
 - Speed: Skip LLM call for cached structures
 - Manual override: Edit cached metadata if LLM got it wrong
 - Debugging: Audit what the LLM decided
+- Template reuse: near-identical page structures share one entry (get_similar)
 """
 
-import json
 import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from pydantic import BaseModel
+
+from . import fast_json
 from .schemas import Metadata
+from .prompt_compressor import skeleton_tokens
 from .logger import get_module_logger
 
 logger = get_module_logger("metadata_cache")
 
+# --- Structural similarity (SimHash) ---
+# Pages generated from one template differ in text but share their tag/id/class
+# skeleton, so their LLM selectors are interchangeable.  A 128-bit SimHash of
+# the skeleton maps similar structures to sketches with a small Hamming
+# distance.  For lookup we split each sketch into SIMHASH_BANDS bands: two
+# sketches within (SIMHASH_BANDS - 1) bits of each other must agree on at
+# least one band, so only entries sharing a band need a full comparison.
+
+SIMHASH_BITS = 128
+SIMHASH_BANDS = 16
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# Tokens per shingle: 3 consecutive tags capture local nesting/order
+_SHINGLE_SIZE = 3
+
+
+def structure_sketch(html: str) -> int:
+    """Compute a 128-bit SimHash over shingles of the HTML's tag skeleton."""
+    tokens = skeleton_tokens(html)
+    if not tokens:
+        return 0
+
+    shingles = [" ".join(tokens[i:i + _SHINGLE_SIZE])
+                for i in range(max(1, len(tokens) - _SHINGLE_SIZE + 1))]
+
+    # Each bit of the SimHash is the majority vote of that bit over all
+    # shingle hashes.  Counting the votes bit by bit in Python costs
+    # SIMHASH_BITS steps per shingle; instead keep the per-bit counts
+    # bit-sliced: planes[j] holds bit j of all 128 counters, and adding a
+    # hash is a ripple-carry add of whole integers (~2 steps amortized).
+    planes: list[int] = []
+    for shingle in shingles:
+        carry = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=16).digest(), "big")
+        for j, plane in enumerate(planes):
+            planes[j] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+
+    sketch = 0
+    for bit in range(SIMHASH_BITS):
+        ones = sum(((plane >> bit) & 1) << j for j, plane in enumerate(planes))
+        # More 1s than 0s among the shingles
+        if 2 * ones > len(shingles):
+            sketch |= 1 << bit
+    return sketch
+
+
+def sketch_similarity(a: int, b: int) -> float:
+    """Fraction of SimHash bits two sketches agree on (1.0 = identical)."""
+    return 1.0 - bin(a ^ b).count("1") / SIMHASH_BITS
+
+
+def _bands(sketch: int) -> list[tuple[int, int]]:
+    return [(i, (sketch >> (i * _BAND_BITS)) & _BAND_MASK) for i in range(SIMHASH_BANDS)]
+
+
+# Reading many small cache files is dominated by filesystem latency, which
+# threads can overlap; below this many files a pool isn't worth starting.
+PARALLEL_READ_MIN_FILES = 32
+PARALLEL_READ_WORKERS = 16
+
+
+def _load_file(path: Path) -> Optional[dict]:
+    """Parse one cache file; None if it vanished or isn't valid JSON."""
+    try:
+        return fast_json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _load_files(paths: list[Path]) -> list[Optional[dict]]:
+    """Parse cache files (concurrently for large directories), in order."""
+    if len(paths) < PARALLEL_READ_MIN_FILES:
+        return [_load_file(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=PARALLEL_READ_WORKERS) as pool:
+        return list(pool.map(_load_file, paths))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file so readers see either the old or the new content.
+
+    analyze_many() threads and other processes may read an entry while it
+    is being (re)written; a temp file + os.replace() never exposes a
+    half-written JSON file to them.
+    """
+    # Opened with mode 0666 (not mkstemp()'s 0600) so the kernel applies the
+    # process's current umask, as for any normally created file.  O_EXCL plus
+    # a random name keeps concurrent writers off each other's temp files.
+    tmp_name = path.parent / f".{path.stem}.{uuid.uuid4().hex}.tmp"
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class _CacheEntry(BaseModel):
+    """
+    The fields of a cache file that lookups need.
+
+    Parsing a file through this model with model_validate_json() decodes and
+    validates in one pass (pydantic-core), instead of json.loads() building
+    a dict tree that Metadata(**...) then walks a second time.  Other keys
+    (extra_info, simhash, ...) are ignored.
+    """
+    created_at: Optional[str] = None
+    prompt_version: Optional[str] = None
+    metadata: Metadata
+
+    def is_stale(self, prompt_version: Optional[str]) -> bool:
+        """
+        True if the entry was produced by a different prompt.
+
+        Entries without a recorded version (older or hand-written files) are
+        never stale, so manual overrides keep working.
+        """
+        return bool(prompt_version and self.prompt_version
+                    and self.prompt_version != prompt_version)
+
 
 class MetadataCache:
     """
@@ -28,19 +162,32 @@ class MetadataCache:
     Files are named by hash of the HTML structure (not content).
     """
 
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(self, cache_dir: Optional[str] = None, similar_ttl_days: Optional[float] = 30):
         """
         Initialize metadata cache.
 
         Args:
             cache_dir: Directory to store cache files.
                       Defaults to ./metadata_cache/
+            similar_ttl_days: Entries older than this are not reused for
+                      similar (non-exact) pages.  None = never expire.
         """
         if cache_dir is None:
             cache_dir = Path.cwd() / "metadata_cache"
 
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.similar_ttl_days = similar_ttl_days
+
+        # Band → cache keys index for get_similar(); built lazily on first use
+        self._similar_index: Optional[dict[tuple[int, int], set[str]]] = None
+        self._sketches: dict[str, int] = {}
+        self.similarity_hits = 0
+
+        # Parsed entries by cache key, with the file mtime they were read at.
+        # A repeat get() then costs one stat() instead of a read + validation,
+        # and a hand-edited file (new mtime) is still picked up.
+        self._entries: dict[str, tuple[int, _CacheEntry]] = {}
 
         logger.info(f"Metadata cache initialized at: {self.cache_dir}")
 
@@ -68,39 +215,82 @@ class MetadataCache:
         # 12 hex chars (48 bits) is enough to avoid collisions in practice
         return hashlib.md5(html_sample.encode('utf-8', errors='replace')).hexdigest()[:12]
 
-    def get(self, html: str, source_name: Optional[str] = None) -> Optional[Metadata]:
+    def compute_key(self, html: str, source_name: Optional[str] = None) -> str:
+        """
+        Return the cache key get()/put() would use for this HTML.
+
+        Callers doing a get-then-put (cache miss → LLM → store) can compute
+        the key once and pass it to both, instead of hashing the HTML twice.
+        """
+        return self._generate_cache_key(html, source_name)
+
+    def get(
+        self,
+        html: str,
+        source_name: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        prompt_version: Optional[str] = None
+    ) -> Optional[Metadata]:
         """
         Retrieve cached metadata for HTML.
 
         Args:
             html: HTML content (used for key generation if no source_name)
             source_name: Optional source identifier (e.g., filename)
+            cache_key: Precomputed key from compute_key() (skips hashing)
+            prompt_version: If given, entries stored under a different
+                      prompt version count as a miss
 
         Returns:
             Metadata if cached, None otherwise
         """
-        cache_key = self._generate_cache_key(html, source_name)
-        cache_file = self.cache_dir / f"{cache_key}.json"
-
-        if not cache_file.exists():
-            logger.debug(f"Cache miss for key: {cache_key}")
-            return None
+        cache_key = cache_key or self._generate_cache_key(html, source_name)
 
         try:
-            data = json.loads(cache_file.read_text())
-            metadata = Metadata(**data['metadata'])
+            entry = self._load_entry(cache_key)
+            if entry is None:
+                logger.debug(f"Cache miss for key: {cache_key}")
+                return None
+            if entry.is_stale(prompt_version):
+                logger.info(f"Cache entry {cache_key} is from an older prompt, ignoring")
+                return None
             logger.info(f"Cache hit for key: {cache_key}")
-            return metadata
+            # A copy, so a caller editing its Metadata can't change what later
+            # hits (other threads, other documents) get from the memo
+            return entry.metadata.model_copy(deep=True)
         except Exception as e:
             logger.warning(f"Failed to load cached metadata: {e}")
             return None
 
+    def _load_entry(self, cache_key: str) -> Optional[_CacheEntry]:
+        """
+        Parse a cache file, reusing the memoized entry while its mtime is unchanged.
+
+        Returns None if the file doesn't exist.  The returned entry is shared:
+        hand out copies of its metadata, never the object itself.
+        """
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        try:
+            mtime = cache_file.stat().st_mtime_ns
+            loaded = self._entries.get(cache_key)
+            if loaded is not None and loaded[0] == mtime:
+                return loaded[1]
+            entry = _CacheEntry.model_validate_json(cache_file.read_bytes())
+        except FileNotFoundError:
+            # Missing, or deleted between stat() and read
+            return None
+        self._entries[cache_key] = (mtime, entry)
+        return entry
+
     def put(
         self,
         html: str,
         metadata: Metadata,
         source_name: Optional[str] = None,
-        extra_info: Optional[dict] = None
+        extra_info: Optional[dict] = None,
+        cache_key: Optional[str] = None,
+        prompt_version: Optional[str] = None,
+        index_similar: bool = True
     ) -> str:
         """
         Store metadata in cache.
@@ -110,26 +300,122 @@ class MetadataCache:
             metadata: Metadata to cache
             source_name: Optional source identifier
             extra_info: Optional extra information to store
+            cache_key: Precomputed key from compute_key() (skips hashing)
+            prompt_version: Version of the prompt that produced the metadata
+            index_similar: Record the page's structure sketch so get_similar()
+                      can find this entry.  Callers that never use
+                      get_similar() can pass False to skip building it.
 
         Returns:
             Cache key used
         """
-        cache_key = self._generate_cache_key(html, source_name)
+        cache_key = cache_key or self._generate_cache_key(html, source_name)
         cache_file = self.cache_dir / f"{cache_key}.json"
 
+        sketch = structure_sketch(html) if index_similar else 0
         cache_data = {
             "cache_key": cache_key,
             "source_name": source_name,
             "created_at": datetime.now().isoformat(),
+            "simhash": f"{sketch:032x}" if index_similar else None,
+            "prompt_version": prompt_version,
             "metadata": metadata.model_dump(),
             "extra_info": extra_info or {}
         }
 
-        cache_file.write_text(json.dumps(cache_data, indent=2))
+        # Indented so the file stays easy to read and hand-edit
+        _write_atomic(cache_file, fast_json.dumps(cache_data, indent=True).encode("utf-8"))
+        # Don't trust the mtime alone: coarse filesystem clocks may not tick
+        self._entries.pop(cache_key, None)
         logger.info(f"Cached metadata with key: {cache_key} -> {cache_file}")
 
+        if self._similar_index is not None:
+            self._index_sketch(cache_key, sketch)
+
         return cache_key
 
+    def get_similar(
+        self,
+        html: str,
+        threshold: float = 0.9,
+        prompt_version: Optional[str] = None
+    ) -> Optional[Metadata]:
+        """
+        Retrieve metadata cached for a page with a similar structure.
+
+        Used after an exact get() misses: pages from the same template (same
+        tags/ids/classes, different article text) reuse the cached selectors
+        instead of paying for a new LLM call.
+
+        Args:
+            html: HTML content
+            threshold: Minimum SimHash similarity (0–1) to count as a hit
+            prompt_version: If given, entries from a different prompt are ignored
+
+        Returns:
+            Metadata of the most similar cached page, or None
+        """
+        if self._similar_index is None:
+            self._build_similar_index()
+
+        sketch = structure_sketch(html)
+        if not sketch:
+            return None
+
+        candidates = set()
+        for band in _bands(sketch):
+            candidates |= self._similar_index.get(band, set())
+
+        best_key, best_score = None, threshold
+        for key in candidates:
+            score = sketch_similarity(sketch, self._sketches[key])
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+
+        try:
+            entry = self._load_entry(best_key)
+            if entry is None:
+                return None
+            if self.similar_ttl_days is not None:
+                created = datetime.fromisoformat(entry.created_at)
+                if datetime.now() - created > timedelta(days=self.similar_ttl_days):
+                    logger.debug(f"Similar entry {best_key} expired")
+                    return None
+            if entry.is_stale(prompt_version):
+                logger.debug(f"Similar entry {best_key} is from an older prompt")
+                return None
+            metadata = entry.metadata.model_copy(deep=True)
+        except Exception as e:
+            logger.warning(f"Failed to load similar cached metadata: {e}")
+            return None
+
+        self.similarity_hits += 1
+        logger.info(f"Similarity hit: {best_key} (score {best_score:.2f})")
+        return metadata
+
+    def _build_similar_index(self) -> None:
+        """Load the sketch of every cache file into the band index."""
+        self._similar_index = {}
+        self._sketches = {}
+        paths = list(self.cache_dir.glob("*.json"))
+        for cache_file, data in zip(paths, _load_files(paths)):
+            try:
+                # Entries written before sketches existed are skipped
+                if data.get("simhash"):
+                    self._index_sketch(data.get("cache_key", cache_file.stem), int(data["simhash"], 16))
+            except Exception:
+                pass
+
+    def _index_sketch(self, cache_key: str, sketch: int) -> None:
+        if not sketch:
+            return
+        self._sketches[cache_key] = sketch
+        for band in _bands(sketch):
+            self._similar_index.setdefault(band, set()).add(cache_key)
+
     def exists(self, html: str, source_name: Optional[str] = None) -> bool:
         """Check if metadata is cached."""
         cache_key = self._generate_cache_key(html, source_name)
@@ -141,27 +427,38 @@ class MetadataCache:
         cache_key = self._generate_cache_key(html, source_name)
         cache_file = self.cache_dir / f"{cache_key}.json"
 
-        if cache_file.exists():
+        # Unlink directly: no exists() check that could race with another
+        # process deleting the same file
+        try:
             cache_file.unlink()
-            logger.info(f"Deleted cache for key: {cache_key}")
-            return True
-        return False
+        except FileNotFoundError:
+            return False
+        self._entries.pop(cache_key, None)
+        # Rebuilt from disk on the next get_similar()
+        self._similar_index = None
+        logger.info(f"Deleted cache for key: {cache_key}")
+        return True
 
     def clear(self) -> int:
         """Clear all cached metadata. Returns count of deleted files."""
         count = 0
         for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
-            count += 1
+            try:
+                cache_file.unlink()
+                count += 1
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+        self._similar_index = None
         logger.info(f"Cleared {count} cached metadata files")
         return count
 
     def list_cached(self) -> list[dict]:
         """List all cached metadata entries."""
         entries = []
-        for cache_file in sorted(self.cache_dir.glob("*.json")):
+        paths = sorted(self.cache_dir.glob("*.json"))
+        for cache_file, data in zip(paths, _load_files(paths)):
             try:
-                data = json.loads(cache_file.read_text())
                 entries.append({
                     "cache_key": data.get("cache_key"),
                     "source_name": data.get("source_name"),
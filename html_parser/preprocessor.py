@@ -15,14 +15,64 @@ Output: dict with normalized_html, original_html, sanitized_html, encoding info,
 """
 
 import re
+from collections import Counter
+from functools import lru_cache
 from typing import Optional
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, Comment, Tag
+from lxml import etree
 
 from .logger import get_module_logger
 from .exceptions import PreprocessorError
 
 logger = get_module_logger("preprocessor")
 
+# Patterns are compiled once at import rather than per call.
+
+# Double angle brackets (e.g. <<p>>) from copy-paste corruption.
+# Written as '<<+' rather than '<{2,}' so the scan starts from the literal
+# prefix instead of trying the pattern at every '<'.
+_DOUBLE_BRACKET_RE = re.compile(r'<<+(\/?[a-zA-Z][^>]*?)>>+')
+
+# '<' not followed by a tag name, '/' or '!'
+_STRAY_BRACKET_RE = re.compile(r'<(?![a-zA-Z\/!])')
+
+# Double-equals in attributes (href=="/path").  The attribute name is
+# checked with a lookbehind after the literal '==' — a leading (\w+) made the
+# engine retry at every word character, the slowest pass on large pages.
+_MALFORMED_ATTR_RE = re.compile(r'==(?<=\w==)(?=["\'])')
+
+# NULL and the other C0 control characters except tab/newline/CR.  Removed
+# with one subn() pass: str.translate() would copy the whole document even
+# when nothing matches, and is far slower on non-ASCII text.
+_CONTROL_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# <meta charset="..."> — and, since [^>]+ also spans content="text/html; ",
+# the legacy <meta http-equiv="Content-Type" content="...; charset=..."> form.
+# Matched against raw bytes so the head needn't be decoded first.
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?\s*([^\s"\';>]+)', re.IGNORECASE)
+
+# document.write("...") or document.write('...'), allowing escaped quotes
+# inside; group 1 holds a double-quoted argument, group 2 a single-quoted one
+_DOCUMENT_WRITE_RE = re.compile(
+    r'document\.write\s*\(\s*'
+    r'(?:"([^"\\]*(?:\\.[^"\\]*)*)"|\'([^\'\\]*(?:\\.[^\'\\]*)*)\')'
+    r'\s*\)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Tags checked for orphan closers, and one pattern that finds both their
+# openers ('<div', prefix match) and exact closers ('</div>') in one scan.
+# Matched as ('' | '/', tag, '' | '>') tuples against the lowercased document.
+_ORPHAN_CHECK_TAGS = ('span', 'div', 'p', 'footer', 'section')
+_ORPHAN_TAG_RE = re.compile(r'<(/?)(%s)(>?)' % '|'.join(_ORPHAN_CHECK_TAGS))
+
+# Opening tag of any CONTENT_STRIP_ELEMENTS element, to skip the DOM walk
+# in _process_script_style when a page has none
+_STRIP_ELEMENT_RE = re.compile(r'<(?:script|style|noscript)', re.IGNORECASE)
+
+# Inline event handlers (matched against the lowercased document)
+_EVENT_HANDLER_RE = re.compile(r'on(?:click|load|error|mouseover)')
+
 
 class Preprocessor:
     """
@@ -71,29 +121,10 @@ class Preprocessor:
         """
         # Only scan the first 2KB — the HTML spec says charset declarations
         # must appear within the first 1024 bytes; we use 2048 for safety.
-        head = raw_bytes[:2048]
-        try:
-            # Decode as ASCII with errors ignored — we only need to find the
-            # charset string, not faithfully decode the whole document.
-            head_str = head.decode('ascii', errors='ignore')
-        except Exception:
-            return 'utf-8'
-
-        charset = None
-
-        # Try the modern form first: <meta charset="...">
-        m = re.search(r'<meta[^>]+charset=["\']?\s*([^\s"\';>]+)', head_str, re.IGNORECASE)
-        if m:
-            charset = m.group(1).strip().lower()
-
-        # Fall back to legacy: <meta http-equiv="Content-Type" content="...; charset=...">
-        if not charset:
-            m = re.search(
-                r'<meta[^>]+content=["\'][^"\']*charset=([^\s"\';>]+)',
-                head_str, re.IGNORECASE
-            )
-            if m:
-                charset = m.group(1).strip().lower()
+        # One search covers both the modern and the legacy form (see
+        # _META_CHARSET_RE); only the matched label is decoded.
+        m = _META_CHARSET_RE.search(raw_bytes, 0, 2048)
+        charset = m.group(1).decode('ascii', errors='ignore').strip().lower() if m else None
 
         if not charset:
             return 'utf-8'
@@ -101,15 +132,31 @@ class Preprocessor:
         # Apply WHATWG browser mapping so we decode the same way browsers do
         return Preprocessor.WHATWG_CHARSET_MAP.get(charset, charset)
 
-    def __init__(self, preserve_structure: bool = True):
+    def __init__(self, preserve_structure: bool = True, fast_parse: bool = False):
         """
         Initialize preprocessor.
 
         Args:
             preserve_structure: If True, keeps empty tags for structure info.
                               If False, removes them completely.
+            fast_parse: If True, parse with lxml instead of html5lib whenever
+                        libxml2 reports no errors for the document.  Several
+                        times faster on clean pages, but the tree differs in
+                        places (no implied <tbody>, different table recovery),
+                        so metadata cached from html5lib trees may not match.
         """
         self.preserve_structure = preserve_structure
+        self.fast_parse = fast_parse
+
+    @staticmethod
+    def _lxml_parses_cleanly(html: str) -> bool:
+        """True if libxml2 parses html without having to recover from any error."""
+        parser = etree.HTMLParser(recover=True)
+        try:
+            etree.fromstring(html, parser)
+        except (etree.ParserError, ValueError):
+            return False
+        return len(parser.error_log) == 0
 
     def _sanitize_html(self, html: str) -> tuple[str, list[str]]:
         """
@@ -130,63 +177,58 @@ class Preprocessor:
         # --- Sanitization strategy ---
         # These fixes run in a deliberate order: byte-level first, then structural.
         # Each fix targets a specific class of real-world HTML breakage we've encountered.
-        # We always check-then-fix (search before sub) to avoid unnecessary string copies.
+        # Each pattern is applied with subn(): one scan, and when nothing matches the
+        # original string comes back without a copy.
 
         # 1. Replace invalid byte sequences with the Unicode replacement character.
         # This prevents downstream parsers from choking on non-UTF-8 garbage bytes.
-        try:
-            sanitized = sanitized.encode('utf-8', errors='replace').decode('utf-8')
-        except Exception:
-            pass
-
-        # 2. NULL bytes crash many parsers and are never valid in HTML text content.
-        if '\x00' in sanitized:
-            sanitized = sanitized.replace('\x00', '')
+        # A str can only fail to encode because of lone surrogates, so valid input
+        # (the common case) is checked with a strict encode and left as-is rather
+        # than round-tripped through two full-size copies.
+        if not sanitized.isascii():
+            try:
+                sanitized.encode('utf-8')
+            except UnicodeEncodeError:
+                sanitized = sanitized.encode('utf-8', errors='replace').decode('utf-8')
+
+        # 2. NULL bytes crash many parsers and are never valid in HTML text content;
+        # other control characters (except tab/newline/CR) cause invisible parsing
+        # failures or corrupt text output.  Both go in the same pass.
+        nulls = sanitized.count('\x00')
+        sanitized, count = _CONTROL_CHARS_RE.subn('', sanitized)
+        if nulls:
             warnings.append("Removed NULL bytes")
+        if count > nulls:
+            warnings.append("Removed control characters")
 
         # 3. Double angle brackets (e.g. <<p>>) appear in copy-paste corruption.
         # Collapse them so the parser sees a normal tag.
-        double_bracket_pattern = r'<{2,}(\/?[a-zA-Z][^>]*?)>{2,}'
-        if re.search(double_bracket_pattern, sanitized):
-            sanitized = re.sub(double_bracket_pattern, r'<\1>', sanitized)
+        sanitized, count = _DOUBLE_BRACKET_RE.subn(r'<\1>', sanitized)
+        if count:
             warnings.append("Fixed double angle brackets")
 
         # 4. Stray '<' not followed by a tag name — escape them to &lt; so they
         # don't confuse the parser into seeing phantom tags.
-        stray_brackets = r'<(?![a-zA-Z\/!])'
-        if re.search(stray_brackets, sanitized):
-            sanitized = re.sub(stray_brackets, '&lt;', sanitized)
+        sanitized, count = _STRAY_BRACKET_RE.subn('&lt;', sanitized)
+        if count:
             warnings.append("Escaped stray angle brackets")
 
         # 5. Double-equals in attributes (href=="/path") is a common CMS bug.
         # Reduce to single equals so the attribute value is parsed correctly.
-        malformed_attr_pattern = r'(\w+)==(["\'])'
-        if re.search(malformed_attr_pattern, sanitized):
-            sanitized = re.sub(malformed_attr_pattern, r'\1=\2', sanitized)
+        sanitized, count = _MALFORMED_ATTR_RE.subn('=', sanitized)
+        if count:
             warnings.append("Fixed malformed attributes (double equals)")
 
         # 6. Unclosed attribute quotes — too risky to fix heuristically; skipped.
 
         # 7. Orphan closing tags (e.g. </span></footer> without matching openers).
-        # We detect but don't remove them — html5lib's tree builder handles
-        # rebalancing better than a regex can.
-        orphan_pattern = r'</(?:span|div|p|footer|section|header|article|aside|nav)>\s*(?=</)'
-        if re.search(orphan_pattern, sanitized, re.IGNORECASE):
-            pass
+        # Left to html5lib's tree builder, which rebalances them better than a
+        # regex can (the document used to be scanned for them only to do nothing).
 
         # 8. Normalize line endings to \n for consistent downstream processing.
         sanitized = sanitized.replace('\r\n', '\n').replace('\r', '\n')
 
-        # 9. Strip control characters (except tab/newline/CR) that can cause
-        # invisible parsing failures or corrupt text output.
-        control_chars = ''.join(
-            chr(c) for c in range(32) if c not in (9, 10, 13)
-        )
-        if any(c in sanitized for c in control_chars):
-            sanitized = sanitized.translate(str.maketrans('', '', control_chars))
-            warnings.append("Removed control characters")
-
-        # 10. Encoding artifacts (mojibake) are intentionally preserved here.
+        # 9. Encoding artifacts (mojibake) are intentionally preserved here.
         # The raw text represents "browser truth".  Encoding correction happens
         # later in the Extractor via _fix_encoding(), which uses the declared
         # charset to attempt a proper round-trip.
@@ -226,8 +268,12 @@ class Preprocessor:
         # If it fails (rare — usually means a library bug), we fall back to lxml
         # (fast, C-based, tolerant but not WHATWG-compliant), and finally to
         # Python's built-in html.parser (least tolerant, but always available).
+        # With fast_parse, documents lxml handles without recovery skip html5lib.
         try:
-            soup = BeautifulSoup(sanitized_html, 'html5lib')
+            if self.fast_parse and self._lxml_parses_cleanly(sanitized_html):
+                soup = BeautifulSoup(sanitized_html, 'lxml')
+            else:
+                soup = BeautifulSoup(sanitized_html, 'html5lib')
 
             # Try to detect encoding from meta tags
             meta_encoding = self._detect_encoding_from_meta(soup)
@@ -251,7 +297,7 @@ class Preprocessor:
         self._remove_comments(soup)
 
         # Strip content from script/style but preserve tags if needed
-        script_style_info = self._process_script_style(soup)
+        script_style_info = self._process_script_style(soup, sanitized_html)
         if script_style_info['script_count'] > 0:
             warnings.append(
                 f"Removed content from {script_style_info['script_count']} script tags"
@@ -305,7 +351,10 @@ class Preprocessor:
 
     def _remove_comments(self, soup: BeautifulSoup) -> int:
         """Remove HTML comments. Returns count of removed comments."""
-        comments = soup.find_all(string=lambda text: isinstance(text, Comment))
+        # Walking .descendants directly skips find_all()'s per-node filter
+        # machinery.  (find_all(string=Comment) is no shortcut: bs4 calls the
+        # class like a predicate, which matches every string.)
+        comments = [node for node in soup.descendants if isinstance(node, Comment)]
         count = len(comments)
         for comment in comments:
             comment.extract()
@@ -328,31 +377,34 @@ class Preprocessor:
         """
         html_contents = []
 
-        # Two patterns: one for double-quoted strings, one for single-quoted.
-        # Each handles escaped quotes inside the string (e.g. \").
-        patterns = [
-            r'document\.write\s*\(\s*"([^"\\]*(?:\\.[^"\\]*)*)"\s*\)',
-            r"document\.write\s*\(\s*'([^'\\]*(?:\\.[^'\\]*)*)'\s*\)",
-        ]
-
-        for pattern in patterns:
-            matches = re.findall(pattern, script_text, re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                # Unescape common JavaScript string escapes to recover the original HTML
-                html = match.replace(r'\"', '"').replace(r"\'", "'")
-                html = html.replace(r'\n', '\n').replace(r'\t', '\t')
-                if html.strip():
-                    html_contents.append(html)
+        # Most inline scripts never call document.write(); a substring check
+        # is far cheaper than running the regex over them.
+        if 'document.write' not in script_text.lower():
+            return html_contents
+
+        # One pattern for double- and single-quoted strings, so calls are
+        # returned in script order.  Each handles escaped quotes (e.g. \").
+        for double_quoted, single_quoted in _DOCUMENT_WRITE_RE.findall(script_text):
+            # Unescape common JavaScript string escapes to recover the original HTML
+            html = (double_quoted or single_quoted).replace(r'\"', '"').replace(r"\'", "'")
+            html = html.replace(r'\n', '\n').replace(r'\t', '\t')
+            if html.strip():
+                html_contents.append(html)
 
         return html_contents
 
-    def _process_script_style(self, soup: BeautifulSoup) -> dict:
+    def _process_script_style(self, soup: BeautifulSoup, html: Optional[str] = None) -> dict:
         """
         Process script and style elements.
 
         Extracts document.write() content before removing script content.
         Removes their content but can preserve the empty tags
         to indicate where dynamic content might be.
+
+        Args:
+            soup: Parsed document
+            html: The string soup was parsed from; if given and it contains no
+                  script/style/noscript tag, the DOM walk is skipped
         """
         info = {
             'script_count': 0,
@@ -362,49 +414,60 @@ class Preprocessor:
             'document_write_content': []    # HTML recovered from document.write() — fed to Extractor
         }
 
-        # Process script tags — extract useful content before clearing.
-        # Order matters: we must grab document.write() HTML *before* calling .clear().
-        for script in soup.find_all('script'):
-            info['script_count'] += 1
-
-            # Track external script sources (useful for debugging dynamic pages)
-            if script.get('src'):
-                info['script_srcs'].append(script.get('src'))
+        if html is not None and not _STRIP_ELEMENT_RE.search(html):
+            return info
+
+        # One traversal for all three tag types, dispatched by name below.
+        # Scripts are handled during the walk; <style>/<noscript> are only
+        # cleared afterwards, so a <script> nested in a <noscript> still has
+        # its document.write() content when it is processed.
+        containers = []
+        for element in soup.find_all(self.CONTENT_STRIP_ELEMENTS):
+            if element.name == 'script':
+                self._process_script(element, info)
+            else:
+                if element.name == 'style':
+                    info['style_count'] += 1
+                containers.append(element)
+
+        for element in containers:
+            element.clear()
+            if not self.preserve_structure:
+                element.decompose()
 
-            # Inline scripts may contain document.write() with visible content
-            if script.string and script.string.strip():
-                info['inline_scripts_had_content'] = True
-                doc_write_html = self._extract_document_write_content(script.string)
-                info['document_write_content'].extend(doc_write_html)
+        return info
 
-            # Clear the script body to keep the DOM clean for the Analyzer.
-            # If preserve_structure is True, the empty <script> tag remains as a
-            # structural hint; otherwise, remove the element entirely.
-            script.clear()
+    def _process_script(self, script: Tag, info: dict) -> None:
+        """Record and clear one <script> element (see _process_script_style)."""
+        # Order matters: we must grab document.write() HTML *before* calling .clear().
+        info['script_count'] += 1
 
-            if not self.preserve_structure:
-                script.decompose()
+        # Track external script sources (useful for debugging dynamic pages)
+        if script.get('src'):
+            info['script_srcs'].append(script.get('src'))
 
-        # Process style tags
-        for style in soup.find_all('style'):
-            info['style_count'] += 1
-            style.clear()
+        # Inline scripts may contain document.write() with visible content
+        if script.string and script.string.strip():
+            info['inline_scripts_had_content'] = True
+            doc_write_html = self._extract_document_write_content(script.string)
+            info['document_write_content'].extend(doc_write_html)
 
-            if not self.preserve_structure:
-                style.decompose()
+        # Clear the script body to keep the DOM clean for the Analyzer.
+        # If preserve_structure is True, the empty <script> tag remains as a
+        # structural hint; otherwise, remove the element entirely.
+        script.clear()
 
-        # Process noscript tags
-        for noscript in soup.find_all('noscript'):
-            noscript.clear()
-            if not self.preserve_structure:
-                noscript.decompose()
-
-        return info
+        if not self.preserve_structure:
+            script.decompose()
 
     def _detect_anomalies(self, original_html: str, soup: BeautifulSoup) -> list[str]:
         """Detect structural anomalies in the HTML."""
         anomalies = []
 
+        # One lowercase copy for all the case-insensitive checks below;
+        # calling .lower() per check copied the whole document each time.
+        lower_html = original_html.lower()
+
         # Check for common malformed patterns in original HTML
         if '<<' in original_html:
             anomalies.append("double_angle_brackets")
@@ -414,19 +477,19 @@ class Preprocessor:
             anomalies.append("possible_unclosed_tags")
 
         # Check for orphan closing tags (closing tags without opening)
-        # This is a simplified check
-        orphan_patterns = ['</span>', '</div>', '</p>', '</footer>', '</section>']
-        for pattern in orphan_patterns:
-            if original_html.lower().count(pattern) > 0:
+        # This is a simplified check.  Openers and closers for every tag are
+        # counted in a single scan rather than two str.count() passes per tag.
+        tag_counts = Counter(_ORPHAN_TAG_RE.findall(lower_html))
+        for tag_name in _ORPHAN_CHECK_TAGS:
+            closing_count = tag_counts[('/', tag_name, '>')]
+            if closing_count > 0:
                 # Count opening vs closing
-                tag_name = pattern[2:-1]
-                opening_count = original_html.lower().count(f'<{tag_name}')
-                closing_count = original_html.lower().count(f'</{tag_name}>')
+                opening_count = tag_counts[('', tag_name, '')] + tag_counts[('', tag_name, '>')]
                 if closing_count > opening_count:
                     anomalies.append(f"orphan_closing_{tag_name}")
 
         # Check for malformed attributes
-        if '==' in original_html and 'href==' in original_html.lower():
+        if '==' in original_html and 'href==' in lower_html:
             anomalies.append("malformed_href_attribute")
 
         # Check for mixed tag case (not really an anomaly but worth noting)
@@ -434,15 +497,18 @@ class Preprocessor:
             anomalies.append("uppercase_attributes")
 
         # Check for inline event handlers (potential script interaction)
-        event_handlers = ['onclick', 'onload', 'onerror', 'onmouseover']
-        for handler in event_handlers:
-            if handler in original_html.lower():
-                anomalies.append("has_event_handlers")
-                break
+        if _EVENT_HANDLER_RE.search(lower_html):
+            anomalies.append("has_event_handlers")
 
         return anomalies
 
 
+@lru_cache(maxsize=2)
+def _get_preprocessor(preserve_structure: bool = True) -> Preprocessor:
+    """Shared Preprocessor for preprocess(); process() keeps no per-call state."""
+    return Preprocessor(preserve_structure=preserve_structure)
+
+
 def preprocess(html: str, source_encoding: Optional[str] = None,
                declared_charset: Optional[str] = None) -> dict:
     """
@@ -456,5 +522,4 @@ def preprocess(html: str, source_encoding: Optional[str] = None,
     Returns:
         Preprocessed result dict
     """
-    preprocessor = Preprocessor()
-    return preprocessor.process(html, source_encoding, declared_charset=declared_charset)
+    return _get_preprocessor().process(html, source_encoding, declared_charset=declared_charset)
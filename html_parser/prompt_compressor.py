@@ -0,0 +1,196 @@
+"""
+Structural HTML compression for the Analyzer's LLM prompt.
+
+The Analyzer only needs the page *skeleton* to choose selectors: tag names,
+ids, classes and roughly where text lives.  Sending full normalized HTML
+wastes most of the prompt on text, attribute noise (href, data-*, inline
+CSS) and long runs of identical siblings — and the old fixed 15K-char cut
+often dropped the footer/nav markup at the end of the document.
+
+compress_for_analysis() walks the lxml tree once and emits a reduced HTML
+document that keeps selector-relevant structure:
+  - only id, class, role and "is it hidden?" attributes survive
+  - text nodes are collapsed and clipped to TEXT_LIMIT characters
+  - script/style bodies and SVG internals are dropped (the empty tag stays)
+  - runs of identical siblings (same tag+id+class) are capped at MAX_REPEAT
+    with a comment noting how many were skipped
+
+The output is still HTML, so the prompt format and the selectors the LLM
+writes are unchanged — they just see far fewer characters.
+"""
+
+import re
+from html import escape
+from typing import Optional
+
+from lxml import etree
+
+from .logger import get_module_logger
+
+logger = get_module_logger("prompt_compressor")
+
+# Max characters kept from each text node
+TEXT_LIMIT = 32
+
+# Identical siblings beyond this count are summarized by a comment
+MAX_REPEAT = 3
+
+# Attributes the LLM can actually use in CSS/XPath selectors
+KEEP_ATTRIBUTES = ("id", "class", "role")
+
+# Elements whose contents never matter for zone detection
+EMPTY_ELEMENTS = frozenset({"script", "style", "noscript", "svg", "template"})
+
+# Non-content elements dropped entirely
+SKIP_ELEMENTS = frozenset({"meta", "link", "base"})
+
+# Void elements have no closing tag
+VOID_ELEMENTS = frozenset({"area", "br", "col", "embed", "hr", "img", "input",
+                           "source", "track", "wbr"})
+
+TRUNCATION_MARKER = "\n<!-- TRUNCATED -->"
+
+_WS_RE = re.compile(r"\s+")
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+
+
+def _clip(text: Optional[str]) -> str:
+    """Collapse whitespace and clip a text node to TEXT_LIMIT characters."""
+    if not text:
+        return ""
+    text = _WS_RE.sub(" ", text).strip()
+    if len(text) > TEXT_LIMIT:
+        text = text[:TEXT_LIMIT] + "..."
+    return text.replace("&", "&amp;").replace("<", "&lt;")
+
+
+def _open_tag(elem) -> str:
+    """Render the opening tag with only selector-relevant attributes."""
+    parts = [elem.tag]
+    for name in KEEP_ATTRIBUTES:
+        value = elem.get(name)
+        if value:
+            value = escape(_WS_RE.sub(" ", value).strip(), quote=True)
+            parts.append(f'{name}="{value}"')
+    # Keep hidden-ness (not the full inline CSS) so the LLM can still
+    # suggest exclusions like [style*="display:none"]
+    style = elem.get("style")
+    if style and _HIDDEN_STYLE_RE.search(style):
+        parts.append('style="display:none"')
+    elif elem.get("hidden") is not None:
+        parts.append("hidden")
+    return "<" + " ".join(parts) + ">"
+
+
+def _signature(elem) -> tuple:
+    return (elem.tag, elem.get("id"), elem.get("class"))
+
+
+def _emit(elem, out: list) -> None:
+    """Append the compressed rendering of elem (and its subtree) to out."""
+    tag = elem.tag
+    # One opening tag per line; text and closing tags stay inline with it
+    out.append("\n" + _open_tag(elem))
+    if tag in VOID_ELEMENTS:
+        return
+
+    if tag not in EMPTY_ELEMENTS:
+        text = _clip(elem.text)
+        if text:
+            out.append(text)
+
+        prev_sig, repeat, skipped = None, 0, 0
+        for child in elem:
+            # Comments and processing instructions have a non-string tag
+            if not isinstance(child.tag, str) or child.tag in SKIP_ELEMENTS:
+                tail = _clip(child.tail)
+                if tail:
+                    out.append(" " + tail)
+                continue
+
+            sig = _signature(child)
+            if sig == prev_sig:
+                repeat += 1
+            else:
+                if skipped:
+                    out.append(f"\n<!-- {skipped} more <{prev_sig[0]}> -->")
+                prev_sig, repeat, skipped = sig, 1, 0
+
+            if repeat > MAX_REPEAT:
+                skipped += 1
+                continue
+
+            _emit(child, out)
+            tail = _clip(child.tail)
+            if tail:
+                out.append(" " + tail)
+
+        if skipped:
+            out.append(f"\n<!-- {skipped} more <{prev_sig[0]}> -->")
+
+    out.append(f"</{tag}>")
+
+
+def skeleton_tokens(html: str) -> list[str]:
+    """
+    Return the page's structure as a preorder list of "tag#id.class" tokens.
+
+    Text and all other attributes are ignored, so two pages built from the
+    same template produce (nearly) the same token list.
+    """
+    try:
+        root = etree.HTML(html)
+    except (etree.ParserError, ValueError):
+        return []
+    if root is None:
+        return []
+
+    tokens = []
+    for elem in root.iter():
+        if not isinstance(elem.tag, str) or elem.tag in SKIP_ELEMENTS:
+            continue
+        token = elem.tag
+        if elem.get("id"):
+            token += "#" + elem.get("id")
+        if elem.get("class"):
+            token += "." + ".".join(elem.get("class").split())
+        tokens.append(token)
+    return tokens
+
+
+def compress_for_analysis(html: str, budget_chars: Optional[int] = None) -> str:
+    """
+    Reduce HTML to its selector-relevant skeleton for the LLM prompt.
+
+    Args:
+        html: Normalized HTML (Preprocessor output)
+        budget_chars: Optional hard cap on the result length; anything past it
+                      is cut at a line boundary and marked <!-- TRUNCATED -->
+
+    Returns:
+        Compressed HTML string
+    """
+    compressed = html
+    try:
+        root = etree.HTML(html)
+        if root is not None:
+            out: list[str] = []
+            _emit(root, out)
+            compressed = "".join(out).lstrip("\n")
+    except (etree.ParserError, ValueError) as e:
+        # Never block analysis on compression — fall back to the raw HTML
+        logger.warning(f"Prompt compression failed, sending raw HTML: {e}")
+
+    if budget_chars is not None and len(compressed) > budget_chars:
+        # Cut at the last line break so we don't hand the LLM a torn tag.
+        # Lines can be long (e.g. the raw-HTML fallback), so failing that,
+        # cut before the last tag start, and only then at the hard limit.
+        # (Slicing a str never splits a multi-byte character.)
+        cut = compressed.rfind("\n", 0, budget_chars)
+        if cut < budget_chars // 2:
+            cut = compressed.rfind("<", 0, budget_chars)
+        if cut < budget_chars // 2:
+            cut = budget_chars
+        compressed = compressed[:cut] + TRUNCATION_MARKER
+
+    return compressed
@@ -0,0 +1,75 @@
+"""
+Async request/token throttling for concurrent LLM calls.
+
+Providers enforce two budgets per minute: requests (RPM) and tokens (TPM).
+Firing many coroutines at once blows through both and earns 429s, which
+cost more time than they save.  AsyncRateLimiter keeps one token bucket per
+budget; each call waits until both buckets have headroom before it starts.
+
+Modeled on OpenAI's api_request_parallel_processor: capacity refills
+continuously (not in per-minute steps), so steady-state throughput sits just
+under the configured limits without bursts.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count — ~4 characters per token for English/HTML."""
+    return len(text) // 4 + 1
+
+
+class AsyncRateLimiter:
+    """Leaky-bucket limiter over requests-per-minute and tokens-per-minute."""
+
+    def __init__(self, max_rpm: Optional[int] = None, max_tpm: Optional[int] = None):
+        """
+        Args:
+            max_rpm: Max requests per minute (None = unlimited)
+            max_tpm: Max tokens per minute (None = unlimited)
+        """
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        # Buckets start full so the first burst isn't delayed
+        self._requests = float(max_rpm or 0)
+        self._tokens = float(max_tpm or 0)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.max_rpm:
+            self._requests = min(self.max_rpm, self._requests + elapsed * self.max_rpm / 60.0)
+        if self.max_tpm:
+            self._tokens = min(self.max_tpm, self._tokens + elapsed * self.max_tpm / 60.0)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and `tokens` tokens of capacity are available."""
+        # A single request larger than the whole TPM budget could never be
+        # admitted — cap it so it waits for a full bucket instead of forever.
+        if self.max_tpm:
+            tokens = min(tokens, self.max_tpm)
+
+        # The lock serializes waiters so capacity is handed out in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                need_requests = 1 - self._requests if self.max_rpm else 0
+                need_tokens = tokens - self._tokens if self.max_tpm else 0
+                if need_requests <= 0 and need_tokens <= 0:
+                    break
+                # Sleep just long enough for the scarcer bucket to refill
+                wait = max(
+                    need_requests * 60.0 / self.max_rpm if self.max_rpm else 0,
+                    need_tokens * 60.0 / self.max_tpm if self.max_tpm else 0
+                )
+                await asyncio.sleep(wait)
+
+            if self.max_rpm:
+                self._requests -= 1
+            if self.max_tpm:
+                self._tokens -= tokens
@@ -26,6 +26,17 @@ class SelectorList(BaseModel):
     def is_empty(self) -> bool:
         return not self.css and not self.xpath
 
+    @classmethod
+    def empty(cls) -> "SelectorList":
+        """
+        Build an empty SelectorList without running validation.
+
+        Deliberately a fresh instance rather than a shared singleton: Metadata
+        is mutable (callers edit selectors for manual overrides), so an
+        interned EMPTY would leak one document's edits into every other.
+        """
+        return cls.model_construct(css=[], xpath=[])
+
 
 class ContentZones(BaseModel):
     """Defines content zones detected in the HTML."""
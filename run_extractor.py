@@ -23,6 +23,7 @@ load_dotenv()
 from html_parser.preprocessor import Preprocessor
 from html_parser.analyzer import Analyzer
 from html_parser.extractor import Extractor
+from html_parser.logger import setup_logger
 from html_parser.metadata_cache import MetadataCache
 from html_parser.schemas import Metadata
 
@@ -34,6 +35,8 @@ def main():
     parser.add_argument("--analyze", "-a", action="store_true", help="Run analyzer if no cache")
     args = parser.parse_args()
 
+    setup_logger()
+
     preprocessor = Preprocessor()
     extractor = Extractor()
     cache = MetadataCache()
@@ -20,7 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from html_parser.preprocessor import Preprocessor
 from html_parser.extractor import Extractor
-from html_parser.schemas import Metadata, ContentZones, ExtractionHints
+from html_parser.schemas import Metadata, ContentZones, ExtractionHints, SelectorList
 
 
 def test_preprocessor():
@@ -144,7 +144,548 @@ def test_full_pipeline():
         print(f"  Anomalies: {result.metadata_used.anomalies_detected}")
 
 
+def test_single_llm_call_per_parse():
+    """
+    Guardrail: one parse() costs exactly one LLM round trip.
+
+    The Analyzer asks for every content zone in a single JSON response; a
+    change that splits it into sequential prompts would multiply latency.
+    Uses a counting stub client, so no API key is needed.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING LLM CALLS PER PARSE")
+    print("=" * 60)
+
+    from html_parser.main import HTMLParser
+    from html_parser.llm_client import BaseLLMClient
+
+    response = {"content_zones": {"main": {"css": ["body"], "xpath": []}}}
+
+    class CountingClient(BaseLLMClient):
+        def __init__(self):
+            self.calls = 0
+
+        def complete(self, prompt, system_prompt=None, cacheable_prefix=None):
+            self.calls += 1
+            return json.dumps(response)
+
+        def complete_json(self, prompt, system_prompt=None, cacheable_prefix=None):
+            self.calls += 1
+            return response
+
+    client = CountingClient()
+    parser = HTMLParser(llm_client=client)
+    parser.analyzer.use_cache = False  # every parse must reach the LLM
+
+    result = parser.parse(Path("sample1.html").read_text(errors='replace'))
+
+    print(f"LLM calls: {client.calls}, blocks: {len(result.blocks)}")
+    assert client.calls == 1
+
+
+def _template_page(title: str, items: int = 20) -> str:
+    """A page skeleton shared by every "article" of one fake site."""
+    rows = "".join(
+        f'<li class="item"><a class="link" href="/{i}">{title} {i}</a><span class="meta">{i}</span></li>'
+        for i in range(items)
+    )
+    return (
+        '<html><body><header id="top"><nav class="menu"><a href="/">Home</a></nav></header>'
+        f'<main id="content"><h1 class="title">{title}</h1><ul class="list">{rows}</ul></main>'
+        '<footer class="footer"><p>(c) site</p></footer></body></html>'
+    )
+
+
+def test_similar_cache_lookup():
+    """
+    MetadataCache.get_similar(): a page from the same template reuses the
+    cached entry, a structurally different page does not, and entries older
+    than similar_ttl_days are not reused.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING SIMILAR-PAGE CACHE LOOKUP")
+    print("=" * 60)
+
+    import tempfile
+    from datetime import datetime, timedelta
+    from html_parser.metadata_cache import MetadataCache, structure_sketch, sketch_similarity
+
+    metadata = Metadata(content_zones=ContentZones(
+        main=SelectorList(css=["#content"]), footer=SelectorList(css=["footer"])
+    ))
+    page_a = _template_page("Alpha")
+    page_b = _template_page("Beta")  # same template, different text
+    other = "<html><body>" + "".join(
+        f'<table class="grid"><tr><td class="cell">{i}</td></tr></table>' for i in range(20)
+    ) + "</body></html>"
+
+    print(f"Similarity same template: {sketch_similarity(structure_sketch(page_a), structure_sketch(page_b)):.2f}, "
+          f"different: {sketch_similarity(structure_sketch(page_a), structure_sketch(other)):.2f}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = MetadataCache(cache_dir)
+        cache.put(page_a, metadata, source_name="alpha")
+
+        # Hit above the threshold
+        similar = cache.get_similar(page_b, threshold=0.9)
+        assert similar is not None
+        assert similar.content_zones.main.css == ["#content"]
+
+        # Miss below the threshold
+        assert cache.get_similar(other, threshold=0.9) is None
+
+        # Hits are copies: editing one must not leak into the next hit
+        similar.content_zones.main.css.append("body")
+        assert cache.get_similar(page_b, threshold=0.9).content_zones.main.css == ["#content"]
+        exact = cache.get(page_a, source_name="alpha")
+        exact.content_zones.main.css.clear()
+        assert cache.get(page_a, source_name="alpha").content_zones.main.css == ["#content"]
+
+        # Expired: an entry older than similar_ttl_days is not reused
+        cache_file = Path(cache_dir) / "alpha.json"
+        data = json.loads(cache_file.read_text())
+        data["created_at"] = (datetime.now() - timedelta(days=2)).isoformat()
+        cache_file.write_text(json.dumps(data))
+        assert MetadataCache(cache_dir, similar_ttl_days=1).get_similar(page_b, threshold=0.9) is None
+        assert MetadataCache(cache_dir, similar_ttl_days=None).get_similar(page_b, threshold=0.9) is not None
+
+
+def test_batch_clients_with_stub_sdks():
+    """
+    complete_json_batch() against stub OpenAI/Anthropic SDK objects: results
+    map back by custom_id, malformed output becomes a per-item
+    LLMClientError, and a batch that never finishes hits the timeout.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING BATCH CLIENTS (STUB SDKS)")
+    print("=" * 60)
+
+    from types import SimpleNamespace as NS
+    from html_parser.llm_client import OpenAIClient, AnthropicClient
+    from html_parser.exceptions import LLMClientError
+
+    def ok_line(i, content):
+        return json.dumps({"custom_id": str(i), "response": {
+            "status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}})
+
+    class FakeOpenAIBatches:
+        def __init__(self, final_status):
+            self.final_status = final_status
+            self.polls = 0
+
+        def create(self, **kwargs):
+            return NS(id="batch_1", status="validating", output_file_id=None)
+
+        def retrieve(self, batch_id):
+            self.polls += 1
+            if self.final_status is None:  # never finishes
+                return NS(id=batch_id, status="in_progress", output_file_id=None)
+            return NS(id=batch_id, status=self.final_status, output_file_id="file_out")
+
+    output = "\n".join([
+        ok_line(2, '{"n": 2}'),
+        "{not json",                                      # unmappable: skipped
+        ok_line(0, '{"n": 0}'),
+        json.dumps({"custom_id": "1", "response": {"status_code": 500, "body": {}}}),
+        json.dumps({"custom_id": "3", "response": {"status_code": 200, "body": {}}}),
+        ok_line(4, "not json either"),
+        ok_line(99, '{"n": 99}'),                         # out of range: skipped
+    ])
+
+    def openai_client(final_status):
+        client = OpenAIClient.__new__(OpenAIClient)
+        client.model = "stub"
+        client.client = NS(
+            files=NS(create=lambda **kw: NS(id="file_in"),
+                     content=lambda file_id: NS(text=output)),
+            batches=FakeOpenAIBatches(final_status)
+        )
+        return client
+
+    results = openai_client("completed").complete_json_batch(
+        [f"p{i}" for i in range(6)], poll_interval=0)
+    print(f"OpenAI results: {[type(r).__name__ for r in results]}")
+    assert results[0] == {"n": 0} and results[2] == {"n": 2}
+    assert all(isinstance(results[i], LLMClientError) for i in (1, 3, 4, 5))
+
+    try:
+        openai_client(None).complete_json_batch(["p"], poll_interval=0.01, timeout=0.05)
+        assert False, "expected a timeout"
+    except LLMClientError as e:
+        print(f"Timeout: {e.message}")
+        assert "did not finish" in e.message
+
+    # The timeout reaches offline analysis as an AnalysisError
+    from html_parser.analyzer import Analyzer
+    from html_parser.exceptions import AnalysisError
+    from html_parser.preprocessor import preprocess
+    analyzer = Analyzer(llm_client=openai_client(None), use_cache=False)
+    try:
+        analyzer.analyze_many_offline([preprocess("<p>x</p>")], poll_interval=0.01, timeout=0.05)
+        assert False, "expected a timeout"
+    except AnalysisError as e:
+        assert "did not finish" in e.message
+
+    def entry(custom_id, result):
+        return NS(custom_id=custom_id, result=result)
+
+    entries = [
+        entry("1", NS(type="succeeded", message=NS(content=[NS(text='```json\n{"n": 1}\n```')]))),
+        entry("0", NS(type="errored")),
+        entry("2", NS(type="succeeded", message=NS(content=[]))),   # no content block
+        entry("x", NS(type="succeeded")),                           # unmappable: skipped
+    ]
+    polls = iter(["in_progress", "ended"])
+    anthropic_client = AnthropicClient.__new__(AnthropicClient)
+    anthropic_client.model = "stub"
+    anthropic_client.client = NS(messages=NS(batches=NS(
+        create=lambda requests: NS(id="msgbatch_1", processing_status="in_progress"),
+        retrieve=lambda batch_id: NS(id=batch_id, processing_status=next(polls)),
+        results=lambda batch_id: iter(entries)
+    )))
+    results = anthropic_client.complete_json_batch(["a", "b", "c", "d"], poll_interval=0)
+    print(f"Anthropic results: {[type(r).__name__ for r in results]}")
+    assert results[1] == {"n": 1}
+    assert all(isinstance(results[i], LLMClientError) for i in (0, 2, 3))
+
+
+def test_iter_array_items():
+    """
+    fast_json.iter_array_items(): items come out whole however the input is
+    chunked, string values may contain ']' and ',', an empty array yields
+    nothing, and a truncated stream raises.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING STREAMED JSON ARRAY DECODING")
+    print("=" * 60)
+
+    from html_parser.fast_json import iter_array_items, JSONDecodeError
+
+    def chunked(text, size):
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    doc = '{"documents": [ {"doc_id": 0, "t": "a],b,"} ,\n\t{"doc_id": 1, "t": "[x"},2 , "s]" ] }'
+    expected = [{"doc_id": 0, "t": "a],b,"}, {"doc_id": 1, "t": "[x"}, 2, "s]"]
+    # size 1 splits every element across chunk boundaries
+    for size in (1, 2, 5, len(doc)):
+        assert list(iter_array_items(chunked(doc, size), key="documents")) == expected
+
+    # Bare top-level array, optionally fenced
+    assert list(iter_array_items(chunked('```json\n[1, {"a": [2]}]\n```', 3))) == [1, {"a": [2]}]
+
+    # Empty arrays
+    assert list(iter_array_items(['{"documents": []}'], key="documents")) == []
+    assert list(iter_array_items(["[", " ", "]"])) == []
+
+    # Truncated input: complete items are yielded, then the stream errors
+    items = []
+    try:
+        for item in iter_array_items(chunked('{"documents": [{"a": 1}, {"b"', 4), key="documents"):
+            items.append(item)
+        assert False, "expected JSONDecodeError"
+    except JSONDecodeError:
+        pass
+    assert items == [{"a": 1}]
+
+    try:
+        list(iter_array_items(['{"other": 1}'], key="documents"))
+        assert False, "expected JSONDecodeError"
+    except JSONDecodeError:
+        pass
+
+
+def test_async_rate_limiter():
+    """AsyncRateLimiter admits a full bucket at once, then waits for refill."""
+    print("\n" + "=" * 60)
+    print("TESTING ASYNC RATE LIMITER")
+    print("=" * 60)
+
+    import asyncio
+    import time
+    from html_parser.rate_limiter import AsyncRateLimiter
+
+    async def run():
+        # 6000 tokens/min = 100 tokens/s; the bucket starts full
+        limiter = AsyncRateLimiter(max_rpm=None, max_tpm=6000)
+        start = time.monotonic()
+        await limiter.acquire(6000)
+        burst = time.monotonic() - start
+        await limiter.acquire(10)  # needs ~0.1s of refill
+        waited = time.monotonic() - start - burst
+        # Larger than the whole budget: capped, so it waits for a full bucket
+        # instead of forever
+        oversized = AsyncRateLimiter(max_tpm=6000)
+        await asyncio.wait_for(oversized.acquire(10 ** 9), timeout=1)
+        return burst, waited
+
+    burst, waited = asyncio.run(run())
+    print(f"Burst: {burst:.3f}s, refill wait: {waited:.3f}s")
+    assert burst < 0.05
+    assert 0.05 < waited < 0.5
+
+
+def test_compress_for_analysis():
+    """The prompt skeleton keeps selector attributes and caps repeats and text."""
+    print("\n" + "=" * 60)
+    print("TESTING PROMPT COMPRESSION")
+    print("=" * 60)
+
+    from html_parser.prompt_compressor import compress_for_analysis, TRUNCATION_MARKER
+
+    html = (
+        '<html><head><script>var secret = 1;</script><meta charset="utf-8"></head><body>'
+        '<div id="main" class="a b" data-x="1" style="color:red" onclick="f()">'
+        'Lorem ipsum dolor sit amet consectetur adipiscing'
+        + "".join(f'<p class="row">r{i}</p>' for i in range(6))
+        + '<span style="display: none">h</span></div></body></html>'
+    )
+    compressed = compress_for_analysis(html)
+    print(compressed)
+
+    assert '<div id="main" class="a b">' in compressed      # data-x/style/onclick dropped
+    assert "secret" not in compressed and "<script></script>" in compressed
+    assert "<meta" not in compressed
+    assert "Lorem ipsum dolor sit amet conse..." in compressed
+    assert compressed.count('<p class="row">') == 3 and "<!-- 3 more <p> -->" in compressed
+    assert '<span style="display:none">' in compressed      # hidden-ness survives
+
+    # Attribute values are re-quoted, so quotes and brackets must be escaped
+    tricky = compress_for_analysis('<html><body><div class=\'a"b\' id="x<y">t</div></body></html>')
+    assert '<div id="x&lt;y" class="a&quot;b">' in tricky
+
+    truncated = compress_for_analysis(html, budget_chars=60)
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert len(truncated) <= 60 + len(TRUNCATION_MARKER)
+
+
+def test_xpath_position_map():
+    """
+    An XPath match maps to the soup element at the same document position,
+    not merely the first element with the same tag and class.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING XPATH POSITION MAP")
+    print("=" * 60)
+
+    html = ('<html><body><div class="c"><p>first</p></div>'
+            '<div class="c"><p>second</p></div></body></html>')
+    metadata = Metadata(content_zones=ContentZones(main=SelectorList(xpath=['(//div[@class="c"])[2]'])))
+    result = Extractor().extract(html, metadata)
+
+    texts = [block.text for block in result.blocks]
+    print(f"Blocks: {texts}")
+    assert texts == ["second"]
+
+
+def test_analyze_many_batches_and_order():
+    """
+    analyze_many() marshals misses into one streamed call, returns results
+    in input order, and re-analyzes on its own a document the LLM skipped
+    or answered with an invalid entry.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING ANALYZE_MANY")
+    print("=" * 60)
+
+    from html_parser.analyzer import Analyzer
+    from html_parser.llm_client import BaseLLMClient
+    from html_parser.preprocessor import preprocess
+
+    def zones(css):
+        return {"content_zones": {"main": {"css": [css], "xpath": []}}}
+
+    class BatchStub(BaseLLMClient):
+        def __init__(self):
+            self.prompts = []
+
+        def complete(self, prompt, system_prompt=None, cacheable_prefix=None):
+            return json.dumps(self.complete_json(prompt, system_prompt))
+
+        def complete_json(self, prompt, system_prompt=None, cacheable_prefix=None):
+            self.prompts.append(prompt)
+            if "<<<DOC" in prompt:
+                # Out of order, doc 2 is missing and doc 3 fails validation
+                return {"documents": [dict(doc_id=1, **zones("#d1")), dict(doc_id=0, **zones("#d0")),
+                                      dict(doc_id=3, content_zones={"main": {"css": [1, None]}})]}
+            return zones("#single")
+
+        def complete_stream(self, prompt, system_prompt=None, json_mode=False, cacheable_prefix=None):
+            # Small chunks, so entries really arrive piecemeal
+            text = self.complete(prompt, system_prompt)
+            for i in range(0, len(text), 7):
+                yield text[i:i + 7]
+
+    client = BatchStub()
+    analyzer = Analyzer(llm_client=client, use_cache=False)
+    docs = [preprocess(f"<html><body><p>doc {i}</p></body></html>") for i in range(4)]
+    results = analyzer.analyze_many(docs, marshal_batch_size=4)
+
+    mains = [r.content_zones.main.css for r in results]
+    print(f"LLM calls: {len(client.prompts)}, main selectors: {mains}")
+    assert mains == [["#d0"], ["#d1"], ["#single"], ["#single"]]
+    assert len(client.prompts) == 3  # one marshaled call + retries for docs 2 and 3
+
+
+def test_noscript_script_document_write():
+    """
+    A <script> nested in a <noscript> keeps its document.write() content,
+    also when preserve_structure=False removes both elements.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING SCRIPT INSIDE NOSCRIPT")
+    print("=" * 60)
+
+    html = ('<html><body><noscript><style>p {}</style>'
+            '<script>document.write("<p>from script</p>")</script></noscript>'
+            '<p>body</p></body></html>')
+
+    for preserve_structure in (True, False):
+        for fast_parse in (False, True):
+            result = Preprocessor(preserve_structure=preserve_structure,
+                                  fast_parse=fast_parse).process(html)
+            info = result["script_style_info"]
+            assert info["script_count"] == 1 and info["style_count"] == 1
+            assert info["document_write_content"] == ["<p>from script</p>"]
+            assert "from script" not in result["normalized_html"]
+            assert ("<noscript>" in result["normalized_html"]) == preserve_structure
+    print("document.write() content recovered in all modes")
+
+
+def test_malformed_llm_responses():
+    """
+    A response that isn't a JSON object, or doesn't validate as Metadata,
+    surfaces as AnalysisError, never as a raw AttributeError/pydantic error.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING MALFORMED LLM RESPONSES")
+    print("=" * 60)
+
+    import asyncio
+    from html_parser.analyzer import Analyzer
+    from html_parser.exceptions import AnalysisError
+    from html_parser.llm_client import BaseLLMClient
+    from html_parser.preprocessor import preprocess
+
+    class FixedClient(BaseLLMClient):
+        def __init__(self, response):
+            self.response = response
+
+        def complete(self, prompt, system_prompt=None, cacheable_prefix=None):
+            return json.dumps(self.response)
+
+        def complete_json(self, prompt, system_prompt=None, cacheable_prefix=None):
+            return self.response
+
+    doc = preprocess("<html><body><p>doc</p></body></html>")
+    bad_responses = [
+        {"content_zones": {"main": {"css": [1, None], "xpath": []}}},
+        [{"content_zones": {"main": {"css": ["main"], "xpath": []}}}],
+        "main",
+    ]
+    for response in bad_responses:
+        analyzer = Analyzer(llm_client=FixedClient(response), use_cache=False)
+        for run in (lambda: analyzer.analyze(doc),
+                    lambda: asyncio.run(analyzer.aanalyze(doc))):
+            try:
+                run()
+                assert False, "expected AnalysisError"
+            except AnalysisError as e:
+                print(f"{type(response).__name__} response: {e.message}")
+
+    # Offline batch: bad results fail only their own slot
+    from html_parser.exceptions import LLMClientError
+
+    class BatchClient(FixedClient):
+        def complete_json_batch(self, prompts, system_prompt=None, poll_interval=30.0, timeout=None):
+            return [{"content_zones": {"main": {"css": ["main"], "xpath": []}}},
+                    *bad_responses, LLMClientError("boom", provider="stub")][:len(prompts)]
+
+    analyzer = Analyzer(llm_client=BatchClient(None), use_cache=False)
+    docs = [preprocess(f"<html><body><p>doc {i}</p></body></html>") for i in range(len(bad_responses) + 2)]
+    results = analyzer.analyze_many_offline(docs, poll_interval=0)
+    print(f"Offline results: {[type(r).__name__ for r in results]}")
+    assert results[0].content_zones.main.css == ["main"]
+    assert all(isinstance(r, AnalysisError) for r in results[1:])
+
+
+def test_parser_keeps_log_level():
+    """HTMLParser() without log_level leaves an earlier logger level alone."""
+    print("\n" + "=" * 60)
+    print("TESTING LOG LEVEL HANDLING")
+    print("=" * 60)
+
+    import logging
+    from html_parser.main import HTMLParser
+    from html_parser.llm_client import BaseLLMClient
+
+    class NullClient(BaseLLMClient):
+        def complete(self, prompt, system_prompt=None, cacheable_prefix=None):
+            return "{}"
+
+        def complete_json(self, prompt, system_prompt=None, cacheable_prefix=None):
+            return {}
+
+    package_logger = logging.getLogger("html_parser")
+    previous = package_logger.level
+    try:
+        HTMLParser(llm_client=NullClient(), log_level=logging.WARNING)
+        HTMLParser(llm_client=NullClient())
+        assert package_logger.level == logging.WARNING
+        assert len(package_logger.handlers) == 1
+    finally:
+        package_logger.setLevel(previous)
+        for handler in package_logger.handlers:
+            handler.setLevel(previous)
+
+
+def test_extract_many_process_pool():
+    """
+    extract_many() with worker processes returns results in input order,
+    identical to extracting each document on its own.
+    """
+    print("\n" + "=" * 60)
+    print("TESTING PARALLEL EXTRACTION")
+    print("=" * 60)
+
+    from html_parser.extractor import extract_many
+
+    metadata = Metadata(content_zones=ContentZones(
+        main=SelectorList(css=["main", "article", "#content", "body"], xpath=[]),
+        nav=SelectorList(css=["nav", "header"], xpath=[]),
+        footer=SelectorList(css=["footer"], xpath=[]),
+        exclude=SelectorList(css=[".ads", ".sidebar"], xpath=[])
+    ))
+    preprocessor = Preprocessor()
+    documents = []
+    for name in ("sample1.html", "sample2.html", "sample3.html"):
+        preprocessed = preprocessor.process(Path(name).read_text(errors='replace'))
+        script_content = preprocessed["script_style_info"]["document_write_content"]
+        documents.append((preprocessed["normalized_html"], metadata, script_content))
+
+    expected = [Extractor().extract(*args) for args in documents]
+    results = extract_many(documents, workers=2)
+
+    print(f"Blocks per document: {[len(r.blocks) for r in results]}")
+    assert len(results) == len(documents)
+    for result, single in zip(results, expected):
+        assert result.model_dump() == single.model_dump()
+    # The documents differ, so a reordering would have failed the check above
+    assert len({r.model_dump_json() for r in expected}) == len(expected)
+
+
 if __name__ == "__main__":
     test_preprocessor()
     test_extractor_with_predefined_metadata()
     test_full_pipeline()
+    test_single_llm_call_per_parse()
+    test_similar_cache_lookup()
+    test_batch_clients_with_stub_sdks()
+    test_iter_array_items()
+    test_async_rate_limiter()
+    test_compress_for_analysis()
+    test_xpath_position_map()
+    test_analyze_many_batches_and_order()
+    test_noscript_script_document_write()
+    test_malformed_llm_responses()
+    test_parser_keeps_log_level()
+    test_extract_many_process_pool()